@@ -0,0 +1,254 @@
+""" AVL Tree ADT.
+    Defines a self-balancing Binary Search Tree with linked nodes.
+    Each node keeps its height and subtree size, so that insertion, deletion and
+    kth_smallest all stay O(log(N)) regardless of the order the keys arrive in.
+"""
+
+from __future__ import annotations
+
+__docformat__ = 'reStructuredText'
+
+from typing import TypeVar
+from bst import BinarySearchTree
+from node import AVLTreeNode
+
+
+# generic types
+K = TypeVar('K')
+I = TypeVar('I')
+
+
+class AVLTree(BinarySearchTree[K, I]):
+    """ Height-balanced binary search tree, a drop-in replacement for BinarySearchTree. """
+
+    def get_height(self, current: AVLTreeNode | None) -> int:
+        """
+            Explain:
+            - Returns the height of the subtree rooted at current, 0 for an empty subtree.
+
+            Complexity:
+            - Worst case: O(1), return statement
+            - Best case: O(1), return statement
+       """
+        if current is None:
+            return 0
+        return current.height
+
+    def get_size(self, current: AVLTreeNode | None) -> int:
+        """
+            Explain:
+            - Returns the number of nodes in the subtree rooted at current, 0 for an empty subtree.
+
+            Complexity:
+            - Worst case: O(1), return statement
+            - Best case: O(1), return statement
+       """
+        if current is None:
+            return 0
+        return current.subtree_size
+
+    def update(self, current: AVLTreeNode) -> None:
+        """
+            Explain:
+            - Recomputes the height and subtree_size of current from those of its children.
+
+            Complexity:
+            - Worst case: O(1), assignments and numerical operations
+            - Best case: O(1), assignments and numerical operations
+       """
+        current.height = 1 + max(self.get_height(current.left), self.get_height(current.right))
+        current.subtree_size = 1 + self.get_size(current.left) + self.get_size(current.right)
+
+    def balance_factor(self, current: AVLTreeNode) -> int:
+        """
+            Explain:
+            - Returns the height of the left subtree minus the height of the right subtree.
+
+            Complexity:
+            - Worst case: O(1), return statement
+            - Best case: O(1), return statement
+       """
+        return self.get_height(current.left) - self.get_height(current.right)
+
+    def rotate_left(self, current: AVLTreeNode) -> AVLTreeNode:
+        """
+            Explain:
+            - Rotates the subtree rooted at current to the left, so that its right child becomes the new root.
+            - Heights and subtree sizes of the two nodes that move are recomputed bottom up.
+
+            Returns:
+            - the new root of the subtree
+
+            Complexity:
+            - Worst case: O(1), constant number of assignments
+            - Best case: O(1), constant number of assignments
+       """
+        new_root = current.right
+        current.right = new_root.left
+        new_root.left = current
+        self.update(current)
+        self.update(new_root)
+        return new_root
+
+    def rotate_right(self, current: AVLTreeNode) -> AVLTreeNode:
+        """
+            Explain:
+            - Rotates the subtree rooted at current to the right, so that its left child becomes the new root.
+            - Heights and subtree sizes of the two nodes that move are recomputed bottom up.
+
+            Returns:
+            - the new root of the subtree
+
+            Complexity:
+            - Worst case: O(1), constant number of assignments
+            - Best case: O(1), constant number of assignments
+       """
+        new_root = current.left
+        current.left = new_root.right
+        new_root.right = current
+        self.update(current)
+        self.update(new_root)
+        return new_root
+
+    def rebalance(self, current: AVLTreeNode) -> AVLTreeNode:
+        """
+            Explain:
+            - Restores the AVL property at current, assuming both of its subtrees are already AVL trees
+            whose heights differ by at most 2.
+            - Performs a single or double rotation depending on which grandchild is the heavy one.
+
+            Returns:
+            - the new root of the subtree
+
+            Complexity:
+            - Worst case: O(1), at most two rotations
+            - Best case: O(1), no rotation is needed and only update() is called
+       """
+        self.update(current)
+        balance = self.balance_factor(current)
+
+        if balance > 1:  # left heavy
+            if self.balance_factor(current.left) < 0:  # left-right case
+                current.left = self.rotate_left(current.left)
+            return self.rotate_right(current)
+        elif balance < -1:  # right heavy
+            if self.balance_factor(current.right) > 0:  # right-left case
+                current.right = self.rotate_right(current.right)
+            return self.rotate_left(current)
+        return current
+
+    def insert_aux(self, current: AVLTreeNode, key: K, item: I) -> AVLTreeNode:
+        """
+            Explain:
+            - Inserts an item into the tree like BinarySearchTree.insert_aux, then rebalances every node on the
+            way back up.
+
+            Args:
+            - current, AVLTreeNode which is the root of the subtree
+            - key, the key of the node have to insert
+            - item, the item of the node have to store
+
+            Raises:
+            - ValueError, if the item is already existed
+
+            Returns:
+            - the new root of the subtree
+
+            Complexity:
+            - Worst case: O(CompK * log(N)), inserting at the bottom of the tree
+                        - the height of an AVL tree is at most ~1.44 * log(N)
+                        - each rebalance() is O(1)
+            - Best case: O(CompK * log(N)), every insertion ends at a leaf position
+       """
+        if current is None:  # base case: at the leaf
+            self.length += 1
+            return AVLTreeNode(key, item=item)
+        elif key < current.key:
+            current.left = self.insert_aux(current.left, key, item)
+        elif key > current.key:
+            current.right = self.insert_aux(current.right, key, item)
+        else:  # key == current.key
+            raise ValueError('Inserting duplicate item')
+
+        return self.rebalance(current)
+
+    def delete_aux(self, current: AVLTreeNode, key: K) -> AVLTreeNode | None:
+        """
+            Explain:
+            - Deletes an item from the tree like BinarySearchTree.delete_aux, then rebalances every node on the
+            way back up.
+            - When the node to delete has two children, it is replaced by its in-order successor, which is then
+            unlinked from the right subtree by delete_min_aux().
+
+            Args:
+            - current, AVLTreeNode which is the root of the subtree
+            - key, the key of the node to delete
+
+            Raises:
+            - ValueError, if the key is not found that means the node is not occur.
+
+            Returns:
+            - the new root of the subtree
+
+            Complexity:
+            - Worst case: O(CompK * log(N)), the successor is at the bottom of the tree
+            - Best case: O(CompK * log(N)), the key still has to be found before deleting it
+       """
+        if current is None:
+            raise ValueError('Deleting non-existent item')
+        elif key < current.key:
+            current.left = self.delete_aux(current.left, key)
+        elif key > current.key:
+            current.right = self.delete_aux(current.right, key)
+        else:  # we found our key => do actual deletion
+            if current.left is None:
+                self.length -= 1
+                return current.right
+            elif current.right is None:
+                self.length -= 1
+                return current.left
+
+            # general case => move the successor up
+            succ = self.get_minimal(current.right)
+            current.key = succ.key
+            current.item = succ.item
+            current.right = self.delete_min_aux(current.right)
+            self.length -= 1
+
+        return self.rebalance(current)
+
+    def delete_min_aux(self, current: AVLTreeNode) -> AVLTreeNode | None:
+        """
+            Explain:
+            - Unlinks the node with the smallest key from the subtree rooted at current, rebalancing on the way up.
+
+            Returns:
+            - the new root of the subtree
+
+            Complexity:
+            - Worst case: O(log(N)), the height of the subtree
+            - Best case: O(1), current has no left child
+       """
+        if current.left is None:
+            return current.right
+        current.left = self.delete_min_aux(current.left)
+        return self.rebalance(current)
+
+    def build_aux(self, pairs: list[tuple[K, I]], lo: int, hi: int) -> AVLTreeNode | None:
+        """
+            Explain:
+            - Builds the balanced subtree holding pairs[lo:hi] like BinarySearchTree.build_aux, also setting
+            the height of every node. Splitting at the middle keeps both sides within one level of each other.
+
+            Complexity:
+            - Worst case: O(hi - lo), one node per pair
+            - Best case: O(1), the range is empty
+       """
+        if lo >= hi:
+            return None
+        mid = (lo + hi) // 2
+        current = AVLTreeNode(pairs[mid][0], item=pairs[mid][1])
+        current.left = self.build_aux(pairs, lo, mid)
+        current.right = self.build_aux(pairs, mid + 1, hi)
+        self.update(current)
+        return current
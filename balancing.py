@@ -1,32 +1,383 @@
 from __future__ import annotations
-from threedeebeetree import Point, ThreeDeeBeeTree
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, repeat
+from math import ceil
+from typing import Iterator
+from octants import Point, ORDER_RATIO, BASE_CASE_SIZE, sort_axes, select_pivot, partition_octants
 from ratio import Percentiles
 
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, only make_ordering(method="numpy") needs it
+    np = None
 
-def make_ordering(my_coordinate_list: list[Point]) -> list[Point]:
+PARALLEL_THRESHOLD = 20000  # inputs smaller than this are not worth spreading over processes
+
+
+def median_order(lo: int, hi: int) -> list[int]:
+    """
+    Explain:
+        - Returns the positions lo to hi - 1 in the pre-order of the balanced binary tree over them: the median
+        first, then the medians of each half, and so on.
+
+    Complexity: O(n) for n positions.
+    """
+    if lo >= hi:
+        return []
+    median = (lo + hi) // 2
+    return [median] + median_order(lo, median) + median_order(median + 1, hi)
+
+
+# the order in which iter_ordering_select() yields a group small enough for the base case, for every size of group
+MEDIAN_ORDERS = [median_order(0, size) for size in range(BASE_CASE_SIZE + 1)]
+
+
+def make_ordering(my_coordinate_list: list[Point], method: str = "select", workers: int = 1) -> list[Point]:
     """
     Explain:
         - Given a list of points, return a list of points that is ordered in a way so that when inserted into a 3D
         BST, the resulting tree is balanced, i.e. for all nodes, the positive offset and negative offset subtrees of
         any axis is bounded by the ratio 1:7.
+        - "select" picks every pivot from per-axis orders sorted once up front, see iter_ordering_select().
+        "percentiles" picks them from three Percentiles built per recursion level, see
+        iter_ordering_percentiles(). "numpy" runs the "select" strategy on a NumPy array, see iter_ordering_numpy().
+        They all give balanced, but not identical, orderings.
+        - The ordering is collected from iter_ordering(), which yields the points one by one.
+        - With more than one worker, the octants are ordered in separate processes, see make_ordering_parallel().
+        The result is the same as with one worker.
 
     Args:
         - my_coordinate_list: a list of points in 3D space to be rearranged.
+        - method: "select", "percentiles" or "numpy".
+        - workers: the number of processes to use.
+
+    Raises:
+        - ValueError: if the method is unknown, or workers is less than 1.
+        - ImportError: if the method is "numpy" and NumPy is not installed.
 
     Returns:
         - a list of points in 3D space that is ordered in a way that when inserted into a 3D BST, the resulting tree
         is balanced.
 
+    Complexity: O(nlog(n)) for "select", which sorts once; "numpy" sorts again at every level, O(nlog^2(n)) but in
+    C. See each iter_ordering_*() for details.
+    """
+    if method not in SPLITS:
+        raise ValueError('Unknown method: {0}'.format(method))
+    if workers < 1:
+        raise ValueError('workers must be at least 1')
+    if workers > 1 and len(my_coordinate_list) >= PARALLEL_THRESHOLD:
+        return make_ordering_parallel(my_coordinate_list, method, workers)
+    return list(iter_ordering(my_coordinate_list, method))
+
+
+def iter_ordering(my_coordinate_list: list[Point], method: str = "select") -> Iterator[Point]:
+    """
+    Explain:
+        - make_ordering() as a generator: yields the points in the same order, each one as soon as it is decided.
+        A pivot is yielded before its octants are even split, and a group small enough for the base case as soon
+        as it is reached, so a consumer, e.g. a loop inserting into a ThreeDeeBeeTree or writing to a file, can
+        start right after the first split, and the ordering never has to be held as a whole.
+        - Every method has to see all the points before it can pick the first pivot, e.g. "select" sorts them
+        along each axis first, so the first point takes O(nlog(n)) but the rest follow at the pace of the splits.
+
+    Args:
+        - my_coordinate_list: a list of points in 3D space to be rearranged.
+        - method: "select", "percentiles" or "numpy".
+
+    Raises:
+        - ValueError: if the method is unknown, as soon as this is called.
+        - ImportError: if the method is "numpy" and NumPy is not installed, as soon as this is called.
+
+    Returns:
+        - an iterator over the points in balanced insertion order.
+
+    Complexity: O(nlog(n)) in total, like make_ordering(), with O(nlog(n)) before the first point.
+    """
+    if method == "select":
+        return iter_ordering_select(my_coordinate_list)
+    elif method == "percentiles":
+        return iter_ordering_percentiles(my_coordinate_list)
+    elif method == "numpy":
+        if np is None:
+            raise ImportError('make_ordering(method="numpy") requires NumPy')
+        return iter_ordering_numpy(my_coordinate_list)
+    raise ValueError('Unknown method: {0}'.format(method))
+
+
+def make_ordering_parallel(my_coordinate_list: list[Point], method: str, workers: int) -> list[Point]:
+    """
+    Explain:
+        - make_ordering() spread over several processes.
+        - split_for_workers() runs the top of the recursion here, and packs every group left to order into jobs
+        of about an even share per worker. Every method orders an octant the same way whether it is reached by
+        recursion or passed to make_ordering() on its own, so the jobs are ordered by order_groups() in a
+        ProcessPoolExecutor, and the pivots and ordered groups are joined back in pre-order.
+        - No group is ordered here, so the pool does all of the ordering and more workers never leave more of it
+        to this process.
+
+    Args:
+        - my_coordinate_list: a list of points in 3D space to be rearranged.
+        - method: "select", "percentiles" or "numpy".
+        - workers: the number of processes to use.
+
+    Returns:
+        - the points in balanced insertion order, the same as make_ordering(my_coordinate_list, method).
+
+    Complexity: O(nlog(n) / workers) per process, plus O(n) per split level here and the cost of sending the
+    points to and from the workers.
+    """
+    segments, jobs = split_for_workers(my_coordinate_list, method, workers)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        ordered = iter([group for job in executor.map(order_groups, jobs, repeat(method)) for group in job])
+
+    order = []
+    for segment in segments:
+        if isinstance(segment, tuple):
+            order.append(segment[0])
+        else:
+            order += next(ordered)
+    return order
+
+
+def split_for_workers(my_coordinate_list: list[Point], method: str,
+                      workers: int) -> tuple[list[tuple[Point] | list[Point]], list[list[list[Point]]]]:
+    """
+    Explain:
+        - Splits groups of points larger than an even share per worker, ceil(n / workers), around their pivot with
+        the method's split function, in pre-order, until no such group is left.
+        - The groups left, of any size, are then packed in pre-order into jobs of at most a share of points each,
+        so that small octants travel together instead of each paying for its own round trip to a worker.
+
+    Args:
+        - my_coordinate_list: a list of points in 3D space to be rearranged.
+        - method: "select", "percentiles" or "numpy".
+        - workers: the number of processes to share the points between.
+
+    Returns:
+        - the segments in pre-order, each a pivot as a 1-tuple or a non-empty group of points still to be ordered.
+        - the jobs, lists of the groups of the segments, in the same order.
+
+    Complexity: O(n) per split level, O(nlog(workers)) in total for balanced splits.
+    """
+    split = SPLITS[method]
+    limit = ceil(len(my_coordinate_list) / workers)
+    segments = []
+
+    def expand_aux(points):
+        if len(points) <= limit:
+            segments.append(points)
+        else:
+            selected, octants = split(points)
+            segments.append((selected,))
+            for octant in octants:
+                if octant:
+                    expand_aux(octant)
+
+    if my_coordinate_list:
+        expand_aux(my_coordinate_list)
+    jobs, size = [], limit
+    for segment in segments:
+        if isinstance(segment, list):
+            if size + len(segment) > limit:
+                jobs.append([])
+                size = 0
+            jobs[-1].append(segment)
+            size += len(segment)
+    return segments, jobs
+
+
+def order_groups(groups: list[list[Point]], method: str) -> list[list[Point]]:
+    """
+    Explain:
+        - Orders each group of a job with make_ordering(), in one worker process.
+
+    Complexity: O(nlog(n)) over the n points of the groups.
+    """
+    return [make_ordering(group, method) for group in groups]
+
+
+def iter_ordering_select(my_coordinate_list: list[Point]) -> Iterator[Point]:
+    """
+    Explain:
+        - iter_ordering() with pivots chosen by order statistics.
+        - The points are sorted once along each axis. Every group of points then gets a pivot between the 1/7 and
+        6/7 order statistics of all three axes by binary search in these sorted lists with select_pivot(), and
+        its three lists are split into the 8 octants with partition_octants(). A stable split
+        keeps every octant's lists sorted, so nothing is ever sorted again, and no tree is built.
+        - The groups are kept on an explicit stack rather than the call stack, so that no input can run into the
+        recursion limit, and no frame is paid per group.
+        - A group small enough for the base case is balanced in any order, but inserted in x order its points would
+        chain one below the other. It is yielded in MEDIAN_ORDERS instead, its x-median first, so that they end
+        up O(log(BASE_CASE_SIZE)) deep.
+
+    Args:
+        - my_coordinate_list: a list of points in 3D space to be rearranged.
+
+    Yields:
+        - the points in balanced insertion order.
+
+    Complexity: O(nlog(n))
+        - the three sorts: O(nlog(n))
+        - every level of groups is O(n) for partition_octants(), and typically O(log(n)) for select_pivot(),
+          whose first candidates are usually suitable. The pivots are balanced, so there are O(log(n)) levels.
+    """
+    stack = [sort_axes(my_coordinate_list)]  # groups still to order, the next one on top
+    while stack:
+        by_x, by_y, by_z = stack.pop()
+        if len(by_x) <= BASE_CASE_SIZE:
+            yield from map(by_x.__getitem__, MEDIAN_ORDERS[len(by_x)])
+            continue
+
+        selected = select_pivot(by_x, by_y, by_z)
+        yield selected
+        octants_x = partition_octants(by_x, selected)
+        octants_y = partition_octants(by_y, selected)
+        octants_z = partition_octants(by_z, selected)
+        for code in range(7, -1, -1):  # pushed backwards, so that they are ordered in pre-order
+            stack.append((octants_x[code], octants_y[code], octants_z[code]))
+
+
+def split_select(points: list[Point]) -> tuple[Point, list[list[Point]]]:
+    """
+    Explain:
+        - One level of iter_ordering_select(): the pivot of points and the 8 octants around it, by octant code.
+
+    Complexity: O(nlog(n)), the sorts.
+    """
+    by_x, by_y, by_z = sort_axes(points)
+    selected = select_pivot(by_x, by_y, by_z)
+    return selected, partition_octants(by_x, selected)
+
+
+def iter_ordering_numpy(my_coordinate_list: list[Point]) -> Iterator[Point]:
+    """
+    Explain:
+        - iter_ordering() for large point clouds, with the per-point Python loops replaced by NumPy operations.
+        - The points are kept in one (n, 3) integer array, and every group of points is an array of indices into
+        it, kept on an explicit stack like in iter_ordering_select(). A pivot is chosen like select_pivot() does:
+        the coordinates of each axis are sorted, the number of points below every point along every axis is found
+        with one searchsorted() per axis, and the suitable point closest to the x-median is taken, or the
+        x-median itself if there is none. The counts are read off each axis in sorted order, where searchsorted()
+        runs fastest.
+        - The octant codes of all points are computed with one vectorized comparison per axis, and the indices are
+        grouped by octant with a stable argsort(), with bincount() giving the size of each group.
+        - The ordering is yielded as the original point tuples.
+
+    Args:
+        - my_coordinate_list: a list of points in 3D space to be rearranged.
+
+    Yields:
+        - the points in balanced insertion order.
+
+    Complexity: O(nlog^2(n)) for balanced splits: every one of the O(log(n)) levels sorts each axis of its points
+    again, O(nlog(n)) per level, in C.
+    """
+    points = points_array(my_coordinate_list)
+    stack = [np.arange(len(points))]  # groups still to order, the next one on top
+    while stack:
+        indices = stack.pop()
+        if len(indices) <= BASE_CASE_SIZE:
+            yield from map(my_coordinate_list.__getitem__, indices.tolist())
+            continue
+
+        selected, grouped, bounds = split_indices(points, indices)
+        yield my_coordinate_list[selected]
+        starts = [0] + bounds[:-1]
+        for code in range(7, -1, -1):  # pushed backwards, so that they are ordered in pre-order
+            stack.append(grouped[starts[code]:bounds[code]])
+
+
+def points_array(my_coordinate_list: list[Point]):
+    """
+    Explain:
+        - Returns the points as an (n, 3) NumPy integer array.
+
+    Complexity: O(n)
+    """
+    return np.fromiter(chain.from_iterable(my_coordinate_list), dtype=np.int64,
+                       count=3 * len(my_coordinate_list)).reshape(-1, 3)
+
+
+def split_indices(points, indices) -> tuple[int, object, list[int]]:
+    """
+    Explain:
+        - One level of iter_ordering_numpy(), on the points of the array points at the given indices.
+
+    Returns:
+        - the index of the pivot, the other indices grouped by octant code, and the end of each group.
+
+    Complexity: O(nlog(n)), the per-axis sorts.
+    """
+    n = len(indices)
+    coordinates = points[indices]
+    min_side = ceil(ORDER_RATIO / 100 * n)
+    below = np.empty((n, 3), dtype=np.int64)
+    for axis in range(3):
+        if axis == 0:  # ties broken by the whole point, the order of by_x in iter_ordering_select()
+            ranked = np.lexsort((coordinates[:, 2], coordinates[:, 1], coordinates[:, 0]))
+            distance = np.empty(n, dtype=np.int64)
+            distance[ranked] = np.abs(np.arange(n) - n // 2)
+        else:
+            ranked = np.argsort(coordinates[:, axis], kind='stable')
+        column = coordinates[ranked, axis]
+        below[ranked, axis] = np.searchsorted(column, column, side='left')
+    suitable = (below >= min_side) & (n - 1 - below >= min_side)
+    suitable = suitable[:, suitable.any(axis=0)].all(axis=1)  # like select_pivot(), skip axes none can balance
+    if suitable.any():
+        distance = np.where(suitable, distance, n)
+    selected = int(np.argmin(distance))
+
+    codes = ((coordinates[:, 0] >= coordinates[selected, 0]).astype(np.int64) << 2
+             | (coordinates[:, 1] >= coordinates[selected, 1]).astype(np.int64) << 1
+             | (coordinates[:, 2] >= coordinates[selected, 2]).astype(np.int64))
+    rest = np.arange(n) != selected
+    grouped = indices[rest][np.argsort(codes[rest], kind='stable')]
+    bounds = np.cumsum(np.bincount(codes[rest], minlength=8))
+    return int(indices[selected]), grouped, bounds.tolist()
+
+
+def split_numpy(my_coordinate_list: list[Point]) -> tuple[Point, list[list[Point]]]:
+    """
+    Explain:
+        - One level of iter_ordering_numpy(): the pivot of the points and the 8 octants around it, by octant code.
+
+    Raises:
+        - ImportError: if NumPy is not installed.
+
+    Complexity: O(nlog(n)), the per-axis sorts.
+    """
+    if np is None:
+        raise ImportError('make_ordering(method="numpy") requires NumPy')
+    selected, grouped, bounds = split_indices(points_array(my_coordinate_list), np.arange(len(my_coordinate_list)))
+    octants, start = [], 0
+    for end in bounds:
+        octants.append([my_coordinate_list[i] for i in grouped[start:end].tolist()])
+        start = end
+    return my_coordinate_list[selected], octants
+
+
+def iter_ordering_percentiles(my_coordinate_list: list[Point]) -> Iterator[Point]:
+    """
+    Explain:
+        - iter_ordering() with pivots chosen by three Percentiles per recursion level.
+
+    Args:
+        - my_coordinate_list: a list of points in 3D space to be rearranged.
+
+    Yields:
+        - the points in 3D space in an order such that when inserted into a 3D BST, the resulting tree
+        is balanced.
+
     Complexity: O(comp(make_ordering_aux())) = O(nlog(n))
         - refer to the helper function for details.
 
     """
-    order_ratio = 1 / 7 * 100  # get ratio in percent
-
-    def make_ordering_aux(current, remaining):
+    def make_ordering_aux(remaining):
         """
         Explain:
-            The algorithm works recursively, and contain two main phases.
+            The algorithm works on a stack of groups of points still to be ordered, starting with all of them, and
+            every group goes through two main phases.
 
             In the first phase, we want to select a new parent node from the list of remaining points.
             For each of the coordinates x, y, and z, we use the ratio() function to get a list of points that are
@@ -38,85 +389,83 @@ def make_ordering(my_coordinate_list: list[Point]) -> list[Point]:
             new parent node. This works all (most..?) of the time.
 
             In the second phase, we simply divide the remaining points into 8 groups relative to the parent's coordinate.
-            We then recursively call the function on each of the 8 groups, and append the results to the current list.
+            We then push the 8 groups on the stack, last one first, so that they are ordered one after the other, and
+            their points yielded as they are decided, in pre-order. Unlike recursion, the stack cannot overflow
+            however deep the groups nest.
 
-            The result will be a list of points that is ordered in a way that when inserted into a 3D BST, the resulting
+            The result will be the points, ordered in a way that when inserted into a 3D BST, the resulting
             tree is balanced.
 
         Complexity: O(nlog(n))
             - Since the algorithm always perform the same operations, the best case complexity is the same as the worst
             case complexity.
 
-            - for loop in the first phase: O(3 * n * log(n)) = O(nlog(n))
-                - for loop: log(n), where n is the number of points in the list.
-                - add_point(): log(n), where n is the number of points in the list.
+            - bulk loading in the first phase: O(3 * n * log(n)) = O(nlog(n))
+                - from_points(): sorts the n points once, then builds a balanced tree in O(n).
             - ratio(): O(log(n) + o), where o is the number of points in the list that are within the 5/7 range.
             - converting lists of tuples into lists from the output of ratio(): O(n)
 
             - finding intersection: O(min(m, n))
             - getting the first element in the list: O(1)
-            - removing the selected point from the list: O(1)
-            - list creation and assignment: O(1)
-            - getting list coordinates: O(1)
+            - dividing the remaining points, leaving out the selected one: O(n), one pass, see partition_octants()
 
-            - recursive call: recursively divides the list into 8 groups, and calls the function on each group;
+            - the stack: every group is divided into 8 groups, which are processed in turn;
               hence, the complexity is O(nlog(n)).
 
             Overall: O(nlog(n))
         """
-        # base case, preserves the balance because less than 7 children
-        if len(remaining) <= 17:  # O(1)
-            current += remaining
+        stack = [remaining]
+        while stack:
+            remaining = stack.pop()
 
-        # overall O(nlog(n))
-        else:
-            x = Percentiles()
-            y = Percentiles()
-            z = Percentiles()
+            # base case, preserves the balance because less than 7 children
+            if len(remaining) <= BASE_CASE_SIZE:  # O(len(remaining))
+                yield from remaining
 
-            for _p in remaining:  # O(n * 3 * log(n)) = O(nlog(n))
-                x.add_point((_p[0], _p))
-                y.add_point((_p[1], _p))
-                z.add_point((_p[2], _p))
+            # overall O(nlog(n))
+            else:
+                selected, octants = split_percentiles(remaining)
+                yield selected  # O(1)
 
-            output_x = x.ratio(order_ratio, order_ratio)  # 3 times O(log(n) + o) = O(log(n) + o)
-            output_y = y.ratio(order_ratio, order_ratio)
-            output_z = z.ratio(order_ratio, order_ratio)
+                # push each octant, backwards, so that the octants are ordered in the order of their codes
+                stack.extend(reversed(octants))
 
-            lst_x = {_p[1] for _p in output_x}  # O(3 * n) = O(n)
-            lst_y = {_p[1] for _p in output_y}
-            lst_z = {_p[1] for _p in output_z}
+    return make_ordering_aux(my_coordinate_list)
 
-            common = list(lst_x.intersection(lst_y, lst_z))  # 2 times O(min(m, n)) = O(?)
 
-            # get the first common point, or the first point in the list
-            if common:
-                selected = common[0]
-            else:
-                selected = remaining[0]
+def split_percentiles(remaining: list[Point]) -> tuple[Point, list[list[Point]]]:
+    """
+    Explain:
+        - One level of iter_ordering_percentiles(): both phases described there. remaining is left untouched.
+
+    Returns:
+        - the selected point and the 8 octants around it, in the order of BeeNode.get_key()'s octant codes.
+
+    Complexity: O(nlog(n)), the bulk loads.
+    """
+    # bulk load each axis, O(3 * n * log(n)) = O(nlog(n)) for the sorts
+    x = Percentiles.from_points((_p[0], _p) for _p in remaining)
+    y = Percentiles.from_points((_p[1], _p) for _p in remaining)
+    z = Percentiles.from_points((_p[2], _p) for _p in remaining)
 
+    output_x = x.ratio(ORDER_RATIO, ORDER_RATIO)  # 3 times O(log(n) + o) = O(log(n) + o)
+    output_y = y.ratio(ORDER_RATIO, ORDER_RATIO)
+    output_z = z.ratio(ORDER_RATIO, ORDER_RATIO)
 
-            current.append(selected)  # O(1)
-            remaining.remove(selected)  # O(1)
+    lst_x = {_p[1] for _p in output_x}  # O(3 * n) = O(n)
+    lst_y = {_p[1] for _p in output_y}
+    lst_z = {_p[1] for _p in output_z}
 
-            # create a 2x2x2 list, essentially 8 different lists for each octant
-            # assign each point to a list based on the x, y, and z coordinates of the selected point
-            lst = [[[[] for _ in range(2)] for _ in range(2)] for _ in range(2)]
+    common = list(lst_x.intersection(lst_y, lst_z))  # 2 times O(min(m, n)) = O(?)
 
-            # find the corresponding location of each point relative to the selected point
-            # this is similar to the BeeNode class's get_key() method
-            for _p in remaining:
-                x_index = int(_p[0] >= selected[0])
-                y_index = int(_p[1] >= selected[1])
-                z_index = int(_p[2] >= selected[2])
-                lst[x_index][y_index][z_index].append(_p)
+    # get the first common point, or the first point in the list
+    if common:
+        selected = common[0]
+    else:
+        selected = remaining[0]
 
-            # for each octant, recursively call make_ordering_aux to get the ordering of the points in that octant
-            for i in range(2):
-                for j in range(2):
-                    for k in range(2):
-                        make_ordering_aux(current, lst[i][j][k])
-        return current
+    # assign each point but the selected one to a list based on the x, y, and z coordinates of the selected point
+    return selected, partition_octants(remaining, selected)  # O(n)
 
-    return make_ordering_aux([], my_coordinate_list)
 
+SPLITS = {"select": split_select, "percentiles": split_percentiles, "numpy": split_numpy}
@@ -2,11 +2,18 @@ from dataclasses import dataclass
 
 from typing import List
 
-from heap import MaxHeap
+from heap import MaxHeap, IndexedMaxHeap
+
+# the fields calculate_emerald() depends on, volume being the last one set by __init__
+EMERALD_FIELDS = frozenset(('capacity', 'nutrient_factor', 'volume'))
 
 @dataclass
 class Beehive:
-    """A beehive has a position in 3d space, and some stats."""
+    """
+    A beehive has a position in 3d space, and some stats.
+    The number of emeralds it yields is kept in the emerald attribute, recomputed whenever one of
+    EMERALD_FIELDS is assigned, so that comparing two beehives is a single comparison of attributes.
+    """
 
     x: int
     y: int
@@ -16,6 +23,19 @@ class Beehive:
     nutrient_factor: int
     volume: int = 0
 
+    def __setattr__(self, name, value):
+        """
+        Explain:
+            - Sets the attribute, then recomputes emerald if the attribute is one of EMERALD_FIELDS.
+            - During __init__, emerald is first computed once volume, the last field, is set.
+
+        Complexity:
+            O(1) Constant time
+        """
+        object.__setattr__(self, name, value)
+        if name in EMERALD_FIELDS and 'volume' in self.__dict__:
+            object.__setattr__(self, 'emerald', self.calculate_emerald())
+
     def calculate_emerald(self):
         """
         Calculate the number of emeralds that can be harvested from this beehive.
@@ -35,36 +55,28 @@ class Beehive:
         Complexity:
             O(1) Constant time
         """
-        if self.calculate_emerald() < other.calculate_emerald():
-            return True
-        return False
+        return self.emerald < other.emerald
 
     def __gt__(self, other):
         """
         Complexity:
             O(1) Constant time
         """
-        if self.calculate_emerald() > other.calculate_emerald():
-            return True
-        return False
+        return self.emerald > other.emerald
 
     def __le__(self, other):
         """
         Complexity:
             O(1) Constant time
         """
-        if self.calculate_emerald() <= other.calculate_emerald():
-            return True
-        return False
+        return self.emerald <= other.emerald
 
     def __ge__(self, other):
         """
         Complexity:
             O(1) Constant time
         """
-        if self.calculate_emerald() >= other.calculate_emerald():
-            return True
-        return False
+        return self.emerald >= other.emerald
 
 
 class BeehiveSelector:
@@ -73,17 +85,28 @@ class BeehiveSelector:
     by calculating the number of emeralds that can be harvested from each beehive.
     """
 
-    def __init__(self, max_beehives: int):
+    def __init__(self, max_beehives: int, indexed: bool = False, growable: bool = False, shrink: bool = False):
         """
         Explain:
             - Initialises a MaxHeap to store the beehives
+            - With growable, max_beehives is only the initial size of the heap, which grows as beehives are added
+            - With shrink, a growable heap also shrinks back as beehives are removed, never below max_beehives
+            - With indexed, an IndexedMaxHeap, which also tracks the index of every beehive so that
+            update_beehive() and remove_beehive() are possible, at the cost of recording an index each time
+            a beehive moves in the heap
         Args:
             - max_beehives: the maximum number of beehives that can be stored in the MaxHeap
+            - indexed: whether beehives can be updated or removed once added
+            - growable: whether more than max_beehives beehives can be added
+            - shrink: whether a growable heap gives memory back as beehives are removed
+        Raises:
+            - ValueError, if shrink is asked without growable
         Complexity:
-            O(1) Constant time
+            O(max_beehives) to allocate the array of the heap
         """
         self.max_beehives = max_beehives
-        self.heap = MaxHeap(self.max_beehives)
+        heap_class = IndexedMaxHeap if indexed else MaxHeap
+        self.heap = heap_class(self.max_beehives, growable=growable, shrink=shrink)
 
     def set_all_beehives(self, hive_list: List[Beehive]):
         """
@@ -116,41 +139,181 @@ class BeehiveSelector:
         """
         self.heap.add(hive)
     
+    def update_beehive(self, hive: Beehive):
+        """
+        Explain:
+            - Moves a beehive already in the heap to its new place, after its capacity, nutrient_factor or
+            volume was changed, instead of rebuilding the heap with set_all_beehives()
+        Args:
+            - hive: the beehive that changed, the very object that was added
+        Raises:
+            - ValueError, if the selector is not indexed
+            - KeyError, if the beehive is not in the selector
+        Complexity:
+            - Worst: O(log n), the beehive rises to the root or sinks to the bottom
+            - Best: O(1), the beehive stays in place
+        """
+        self.indexed_heap_aux().update(hive)
+
+    def remove_beehive(self, hive: Beehive):
+        """
+        Explain:
+            - Removes a beehive from the heap, wherever it is
+        Args:
+            - hive: the beehive to remove, the very object that was added
+        Raises:
+            - ValueError, if the selector is not indexed
+            - KeyError, if the beehive is not in the selector
+        Complexity:
+            - Worst: O(log n), the last beehive, moved to its place, rises or sinks
+            - Best: O(1), the beehive was the last one
+        """
+        self.indexed_heap_aux().remove(hive)
+
+    def __contains__(self, hive: Beehive) -> bool:
+        """
+        Explain:
+            - Checks to see if this very beehive is in the selector
+        Raises:
+            - ValueError, if the selector is not indexed
+        Complexity:
+            O(1) Constant time
+        """
+        return hive in self.indexed_heap_aux()
+
+    def indexed_heap_aux(self) -> IndexedMaxHeap:
+        """
+        Explain:
+            - Returns the heap, checking that it is indexed
+        Raises:
+            - ValueError, if the selector was not created with indexed=True
+        Complexity:
+            O(1) Constant time
+        """
+        if not isinstance(self.heap, IndexedMaxHeap):
+            raise ValueError('BeehiveSelector(indexed=True) is needed to update or remove beehives')
+        return self.heap
+
     def harvest_best_beehive(self):
         """
         Explain:
-            - List to store the values of the linear equation for each beehive
-            - Calculate the value of the linear equation for each beehive and store it in the list
-            - Replace with the appropriate values for each beehive
-            - Sort the list of values in descending order
-            - Return the kth largest value
-            - Return None if k is out of range
+            - Harvests the beehive yielding the most emeralds, at the root of the MaxHeap
+            - Takes capacity off its volume, or empties it, which can only lower its emerald
+            - Sinks it from the root with decrease_top(), instead of removing it with get_max() and adding it
+            back with add_beehive(), which sinks the last beehive from the root and then rises the harvested one
+            - Returns the number of emeralds harvested
 
         Complexity:
             -Worst = O(log n)
-                - heap get_max() has a complexity of O(log n) where n is the number of nodes in the heap.
-                - calculate_emerald() - O(1)
-                - update volume - O(1)
-                - add_beehive() - O(log n)
+                - heap peek_max() - O(1)
+                - emerald - O(1)
+                - update volume - O(1), recomputes emerald
+                - heap decrease_top() has a complexity of O(log n) where n is the number of nodes in the heap,
+                when the beehive sinks to the bottom
                 - return emerald - O(1)
 
             -Best = O(1)
-                - heap get_max() has a complexity of O(1) where n is the number of nodes in the heap.
-                - When all the elements value in the heap are the same.
-                - calculate_emerald() - O(1)
-                - update volume - O(1)
-                - add_beehive() - O(log n)
-                - return emerald - O(1)
+                - heap decrease_top() is O(1) when the harvested beehive is still at least as good as
+                both children of the root, e.g. when all the elements value in the heap are the same.
         """
-        best_beehive = self.heap.get_max()
-        emerald = best_beehive.calculate_emerald()
+        best_beehive = self.heap.peek_max()
+        emerald = best_beehive.emerald
         if best_beehive.volume < best_beehive.capacity:
             best_beehive.volume = 0
         else:
             best_beehive.volume -= best_beehive.capacity
-        self.add_beehive(best_beehive)
+        self.heap.decrease_top()
         return emerald
 
+    def harvest_many(self, n: int, per_step: bool = False):
+        """
+        Explain:
+            - Harvests n times, with exactly the results of n calls to harvest_best_beehive()
+            - The beehive at the root keeps being harvested for as long as its emerald is at least that of the
+            runner-up, the larger child of the root, as decrease_top() then leaves it in place and the
+            runner-up does not change. harvest_run_aux() works out those harvests at once from its volume,
+            so the heap is only touched when the best beehive changes.
+
+        Args:
+            - n: the number of harvests
+            - per_step: also return the emeralds of each harvest
+
+        Raises:
+            - IndexError, if n > 0 and there is no beehive to harvest
+
+        Returns:
+            - the total number of emeralds harvested, and the list of the emeralds of each harvest if per_step
+
+        Complexity:
+            -Worst = O(n log n), the best beehive changes after every harvest, as in n harvest_best_beehive() calls
+            -Best = O(1 + S), the root stays the best for all n harvests, where S is n if per_step, else 0
+        """
+        total = 0
+        steps = [] if per_step else None
+        remaining = n
+        while remaining > 0:
+            best_beehive = self.heap.peek_max()
+            if self.heap.length == 1:
+                runner_up = None
+            elif self.heap.length == 2:
+                runner_up = self.heap.the_array[2].emerald
+            else:
+                runner_up = max(self.heap.the_array[2].emerald, self.heap.the_array[3].emerald)
+
+            harvests = 0
+            for emerald, count in self.harvest_run_aux(best_beehive, runner_up, remaining):
+                total += emerald * count
+                harvests += count
+                if per_step:
+                    steps.extend([emerald] * count)
+            best_beehive.volume = max(best_beehive.volume - harvests * best_beehive.capacity, 0)
+            self.heap.decrease_top()
+            remaining -= harvests
+
+        if per_step:
+            return total, steps
+        return total
+
+    def harvest_run_aux(self, hive: Beehive, runner_up, limit: int) -> List[tuple]:
+        """
+        Explain:
+            - Lists the emeralds of the consecutive harvests of hive, as (emerald, count) runs, up to limit
+            harvests, stopping after the first harvest that leaves it worse than runner_up.
+            - Each harvest takes capacity off the volume, so hive yields capacity * nutrient_factor for
+            volume // capacity harvests, then (volume % capacity) * nutrient_factor once, then 0 forever.
+
+        Args:
+            - hive: the beehive at the root, harvested at least once
+            - runner_up: the emerald of the best other beehive, None if there is none
+            - limit: the maximum number of harvests
+
+        Returns:
+            - the (emerald, count) runs of the harvests, in order
+
+        Complexity:
+            O(1) Constant time, at most three runs
+        """
+        if hive.capacity > 0:
+            full, rest = divmod(hive.volume, hive.capacity)
+            phases = [(hive.capacity * hive.nutrient_factor, full), (rest * hive.nutrient_factor, 1), (0, limit)]
+        else:  # the volume never goes down, nor the emerald from 0
+            phases = [(0, limit)]
+
+        runs = []
+        harvests = 0
+        for emerald, count in phases:
+            count = min(count, limit - harvests)
+            if count <= 0:
+                continue
+            # the first harvest always happens, the next ones only while the previous left hive the best
+            if harvests > 0 and runner_up is not None and emerald < runner_up:
+                break
+            runs.append((emerald, count))
+            harvests += count
+            if harvests == limit:
+                break
+        return runs
+
     def kth_largest(self,k: int, a_1: float, a_2: float, a_3: float):
         hives = []
 
@@ -0,0 +1,6 @@
+""" Benchmarks for the data structures in this repository.
+
+Each module is a script, run from the repository root, e.g.::
+
+    python -m benchmarks.bench_bst
+"""
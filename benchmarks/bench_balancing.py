@@ -0,0 +1,232 @@
+""" Benchmarks of balancing ThreeDeeBeeTree.
+
+- Live insertion of adversarial streams, with and without auto_balance.
+- make_ordering with pivots from Percentiles, from order statistics, and from order statistics on a NumPy array
+  when NumPy is installed (``--ordering n ...`` runs only this, e.g. ``--ordering 100000 1000000``).
+- make_ordering with 1 up to os.cpu_count() workers (``--workers n ...`` runs only this).
+- Memory of make_ordering per method: the tracemalloc peak, and the generation-0 collections of the cyclic GC,
+  one per 700 more containers (lists, tuples, ...) allocated than freed (``--allocations n ...`` runs only this).
+- iter_ordering against make_ordering, feeding a consumer that writes every point out: time to the first point,
+  total time and tracemalloc peak (``--streaming n ...`` runs only this).
+- make_ordering on clustered and collinear points, against the recursive "select" ordering it replaced
+  (``--degenerate n ...`` runs only this).
+
+Run from the repository root with ``python -m benchmarks.bench_balancing [n ...]``.
+"""
+from __future__ import annotations
+
+import gc
+import os
+import random
+import sys
+import tracemalloc
+from time import perf_counter
+
+import balancing
+from balancing import make_ordering, iter_ordering
+from octants import select_pivot, partition_octants, sort_axes, BASE_CASE_SIZE
+from threedeebeetree import ThreeDeeBeeTree
+
+
+def max_depth(tree: ThreeDeeBeeTree) -> int:
+    """ Returns the number of nodes on the longest root-to-leaf path of tree. """
+    deepest = 0
+    stack = [(tree.root, 1)] if tree.root is not None else []
+    while stack:
+        current, depth = stack.pop()
+        deepest = max(deepest, depth)
+        stack.extend((child, depth + 1) for child in current.nodes if child is not None)
+    return deepest
+
+
+def streams(n: int) -> dict[str, list[tuple[int, int, int]]]:
+    """ Returns insertion streams of n points, most of them adversarial for an unbalanced tree. """
+    return {
+        'diagonal': [(i, i, i) for i in range(n)],
+        'sorted x': sorted((random.randrange(10 ** 6), random.randrange(10 ** 6), random.randrange(10 ** 6))
+                           for _ in range(n)),
+        'spiral': [(i, (i * 7919) % n, -i) for i in range(n)],
+        'random': [(random.randrange(10 ** 6), random.randrange(10 ** 6), random.randrange(10 ** 6))
+                   for _ in range(n)],
+        'planar': [(random.randrange(10 ** 6), random.randrange(10 ** 6), 0) for _ in range(n)],
+        'axis line': [(0, 0, i) for i in range(n)],
+    }
+
+
+def compare_auto_balance(sizes: list[int]) -> None:
+    print('{0:>8} {1:>10} {2:>12} {3:>10} {4:>12} {5:>10}'.format(
+        'n', 'stream', 'plain (s)', 'depth', 'auto (s)', 'depth'))
+    for n in sizes:
+        for name, points in streams(n).items():
+            points = list(dict.fromkeys(points))
+            row = []
+            for auto_balance in (False, True):
+                tree = ThreeDeeBeeTree(auto_balance=auto_balance)
+                start = perf_counter()
+                for i, point in enumerate(points):
+                    tree[point] = i
+                row += [perf_counter() - start, max_depth(tree)]
+            print('{0:>8} {1:>10} {2:12.3f} {3:>10} {4:12.3f} {5:>10}'.format(n, name, *row))
+
+
+def random_points(n: int, spread: int = 10 ** 6) -> list[tuple[int, int, int]]:
+    """ Returns n distinct random points. """
+    points = set()
+    while len(points) < n:
+        points.add((random.randrange(spread), random.randrange(spread), random.randrange(spread)))
+    return list(points)
+
+
+def compare_methods(sizes: list[int], methods: tuple[str, ...] = ('percentiles', 'select', 'numpy')) -> None:
+    if balancing.np is None:
+        methods = tuple(method for method in methods if method != 'numpy')
+    print('{0:>8} {1:>12} {2:>10} {3:>10}'.format('n', 'method', 'time (s)', 'depth'))
+    for n in sizes:
+        points = random_points(n)
+        for method in methods:
+            start = perf_counter()
+            ordering = make_ordering(points[:], method=method)
+            elapsed = perf_counter() - start
+            tree = ThreeDeeBeeTree()
+            for i, point in enumerate(ordering):
+                tree[point] = i
+            print('{0:>8} {1:>12} {2:10.3f} {3:>10}'.format(n, method, elapsed, max_depth(tree)))
+
+
+def make_ordering_recursive(points: list[tuple[int, int, int]]) -> list[tuple[int, int, int]]:
+    """ make_ordering(method="select") as it was, recursing once per pivot. """
+    def make_ordering_aux(current, by_x, by_y, by_z):
+        if len(by_x) <= BASE_CASE_SIZE:
+            current += by_x
+            return current
+
+        selected = select_pivot(by_x, by_y, by_z)
+        current.append(selected)
+        octants_x = partition_octants(by_x, selected)
+        octants_y = partition_octants(by_y, selected)
+        octants_z = partition_octants(by_z, selected)
+        for code in range(8):
+            make_ordering_aux(current, octants_x[code], octants_y[code], octants_z[code])
+        return current
+
+    return make_ordering_aux([], *sort_axes(points))
+
+
+def degenerate_points(n: int) -> dict[str, list[tuple[int, int, int]]]:
+    """ Point sets with few distinct coordinates, in the order that is worst for a first-point fallback. """
+    side = max(1, round(n ** 0.5))
+    return {
+        'clusters': sorted({(c * 10 ** 6 + random.randrange(4), c * 10 ** 6 + random.randrange(4), random.randrange(n))
+                            for c in range(max(1, n // 400)) for _ in range(400)}),
+        'collinear': [(i, i, i) for i in range(n)],
+        'axis line': [(0, 0, i) for i in range(n)],
+        'plane': [(i % side, i // side, 0) for i in range(n)],
+    }
+
+
+def compare_degenerate(sizes: list[int]) -> None:
+    orderings = {'recursive': make_ordering_recursive, 'select': make_ordering,
+                 'percentiles': lambda points: make_ordering(points, method='percentiles')}
+    if balancing.np is not None:
+        orderings['numpy'] = lambda points: make_ordering(points, method='numpy')
+    print('{0:>8} {1:>10} {2:>12} {3:>10} {4:>10}'.format('n', 'points', 'ordering', 'time (s)', 'depth'))
+    for n in sizes:
+        for name, points in degenerate_points(n).items():
+            for method, ordering in orderings.items():
+                start = perf_counter()
+                try:
+                    order = ordering(points[:])
+                except RecursionError:
+                    print('{0:>8} {1:>10} {2:>12} {3:>10}'.format(n, name, method, 'RecursionError'))
+                    continue
+                elapsed = perf_counter() - start
+                tree = ThreeDeeBeeTree()
+                for i, point in enumerate(order):
+                    tree[point] = i
+                print('{0:>8} {1:>10} {2:>12} {3:10.3f} {4:>10}'.format(n, name, method, elapsed, max_depth(tree)))
+
+
+def compare_allocations(sizes: list[int], methods: tuple[str, ...] = ('percentiles', 'select', 'numpy')) -> None:
+    if balancing.np is None:
+        methods = tuple(method for method in methods if method != 'numpy')
+    print('{0:>8} {1:>12} {2:>10} {3:>10} {4:>14}'.format('n', 'method', 'time (s)', 'peak (MiB)', 'gen-0 GCs'))
+    for n in sizes:
+        points = random_points(n)
+        for method in methods:
+            start = perf_counter()
+            make_ordering(points[:], method=method)
+            elapsed = perf_counter() - start
+
+            collections = gc.get_stats()[0]['collections']
+            tracemalloc.start()
+            make_ordering(points[:], method=method)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            collections = gc.get_stats()[0]['collections'] - collections
+            print('{0:>8} {1:>12} {2:10.3f} {3:10.1f} {4:>14}'.format(n, method, elapsed, peak / 2 ** 20, collections))
+
+
+def consume(points, sink) -> float:
+    """ Writes every point to sink, returns the time the first one arrived. """
+    first = None
+    for point in points:
+        if first is None:
+            first = perf_counter()
+        sink.write('{0} {1} {2}\n'.format(*point))
+    return first
+
+
+def compare_streaming(sizes: list[int], methods: tuple[str, ...] = ('select', 'numpy')) -> None:
+    if balancing.np is None:
+        methods = tuple(method for method in methods if method != 'numpy')
+    print('{0:>8} {1:>8} {2:>14} {3:>12} {4:>10} {5:>10}'.format(
+        'n', 'method', 'how', 'first (s)', 'total (s)', 'peak (MiB)'))
+    with open(os.devnull, 'w') as sink:
+        for n in sizes:
+            points = random_points(n)
+            for method in methods:
+                for how, ordering in (('make_ordering', make_ordering), ('iter_ordering', iter_ordering)):
+                    tracemalloc.start()
+                    start = perf_counter()
+                    first = consume(ordering(points, method=method), sink)
+                    elapsed = perf_counter() - start
+                    peak = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+                    print('{0:>8} {1:>8} {2:>14} {3:12.3f} {4:10.3f} {5:10.1f}'.format(
+                        n, method, how, first - start, elapsed, peak / 2 ** 20))
+
+
+def compare_workers(sizes: list[int], method: str = 'select') -> None:
+    counts = sorted({1, 2, 4, 8, os.cpu_count() or 1} & set(range(1, (os.cpu_count() or 1) + 1)))
+    print('{0:>8} {1:>8} {2:>10} {3:>10}'.format('n', 'workers', 'time (s)', 'speedup'))
+    for n in sizes:
+        points = random_points(n)
+        serial = None
+        for workers in counts:
+            start = perf_counter()
+            ordering = make_ordering(points, method=method, workers=workers)
+            elapsed = perf_counter() - start
+            if serial is None:
+                serial, baseline = ordering, elapsed
+            assert ordering == serial
+            print('{0:>8} {1:>8} {2:10.3f} {3:10.2f}'.format(n, workers, elapsed, baseline / elapsed))
+
+
+if __name__ == '__main__':
+    random.seed(0)
+    args = sys.argv[1:]
+    if args and args[0] == '--ordering':
+        compare_methods([int(arg) for arg in args[1:]] or [100000])
+    elif args and args[0] == '--streaming':
+        compare_streaming([int(arg) for arg in args[1:]] or [100000, 1000000])
+    elif args and args[0] == '--allocations':
+        compare_allocations([int(arg) for arg in args[1:]] or [20000, 200000])
+    elif args and args[0] == '--degenerate':
+        compare_degenerate([int(arg) for arg in args[1:]] or [100000])
+    elif args and args[0] == '--workers':
+        compare_workers([int(arg) for arg in args[1:]] or [1000000])
+    else:
+        sizes = [int(arg) for arg in args] or [1000, 4000]
+        compare_auto_balance(sizes)
+        print()
+        compare_methods(sizes)
@@ -0,0 +1,163 @@
+""" Benchmarks of BeehiveSelector.
+
+- set_all_beehives followed by harvest_best_beehive calls, with the emerald of each beehive cached in an
+  attribute against recomputing calculate_emerald() on both sides of every heap comparison.
+- ``--replace``: harvests per second of harvest_best_beehive, sinking the harvested beehive in place with
+  MaxHeap.decrease_top() against the get_max() then add_beehive() it replaced.
+- ``--many``: harvest_many(10 ** 6) against as many harvest_best_beehive calls, for beehives with large
+  volumes, that stay the best for many harvests, and small ones, that are overtaken after one or two.
+
+- ``--update``: changing the capacity of one beehive with update_beehive on an indexed selector against
+  rebuilding the heap with set_all_beehives, and the cost of the index on harvest_best_beehive.
+
+Run from the repository root with ``python -m benchmarks.bench_beehive [--replace | --many | --update] [n ...]``.
+"""
+from __future__ import annotations
+
+import random
+import sys
+from time import perf_counter
+
+from beehive import Beehive, BeehiveSelector
+
+
+class RecomputingBeehive(Beehive):
+    """ The comparisons that Beehive used to have, recomputing the emeralds of both beehives every time. """
+
+    __setattr__ = object.__setattr__
+
+    @property
+    def emerald(self):
+        return self.calculate_emerald()
+
+    def __lt__(self, other):
+        return self.calculate_emerald() < other.calculate_emerald()
+
+    def __gt__(self, other):
+        return self.calculate_emerald() > other.calculate_emerald()
+
+    def __le__(self, other):
+        return self.calculate_emerald() <= other.calculate_emerald()
+
+    def __ge__(self, other):
+        return self.calculate_emerald() >= other.calculate_emerald()
+
+
+class GetMaxAddSelector(BeehiveSelector):
+    """ The harvest that BeehiveSelector used to have: get_max() sinks the last beehive, add_beehive() rises. """
+
+    def harvest_best_beehive(self):
+        best_beehive = self.heap.get_max()
+        emerald = best_beehive.emerald
+        if best_beehive.volume < best_beehive.capacity:
+            best_beehive.volume = 0
+        else:
+            best_beehive.volume -= best_beehive.capacity
+        self.add_beehive(best_beehive)
+        return emerald
+
+
+HARVESTS = 10 ** 6
+
+
+def random_specs(n: int) -> list[tuple[int, ...]]:
+    return [(random.randrange(1000), random.randrange(1000), random.randrange(1000),
+             random.randint(1, 50), random.randint(1, 20), random.randrange(10 ** 6)) for _ in range(n)]
+
+
+def time_harvests(hive_class, specs: list[tuple[int, ...]], selector_class=BeehiveSelector) -> tuple[float, float]:
+    selector = selector_class(len(specs))
+    hives = [hive_class(*spec) for spec in specs]
+    start = perf_counter()
+    selector.set_all_beehives(hives)
+    built = perf_counter()
+    total = 0
+    for _ in range(HARVESTS):
+        total += selector.harvest_best_beehive()
+    return built - start, perf_counter() - built
+
+
+def compare_emerald(sizes: list[int]) -> None:
+    print('{0:>8} {1:>12} {2:>16} {3:>16}'.format('n', 'emerald', 'set_all (ms)', 'harvests (s)'))
+    for n in sizes:
+        specs = random_specs(n)
+        for name, hive_class in [('recomputed', RecomputingBeehive), ('cached', Beehive)]:
+            set_all, harvests = time_harvests(hive_class, specs)
+            print('{0:>8} {1:>12} {2:16.3f} {3:16.3f}'.format(n, name, set_all * 1e3, harvests))
+
+
+def compare_replace(sizes: list[int]) -> None:
+    print('{0:>8} {1:>16} {2:>16}'.format('n', 'get_max + add', 'decrease_top'))
+    for n in sizes:
+        specs = random_specs(n)
+        rates = [HARVESTS / time_harvests(Beehive, specs, selector_class)[1]
+                 for selector_class in (GetMaxAddSelector, BeehiveSelector)]
+        print('{0:>8} {1:>12.0f} h/s {2:>12.0f} h/s'.format(n, *rates))
+
+
+def compare_many(sizes: list[int]) -> None:
+    print('{0:>8} {1:>8} {2:>16} {3:>16} {4:>16}'.format(
+        'n', 'volumes', 'one by one (s)', 'harvest_many (s)', 'per_step (s)'))
+    for n in sizes:
+        for name, volume in [('large', 10 ** 6), ('small', 100)]:
+            specs = [spec[:5] + (random.randrange(volume),) for spec in random_specs(n)]
+            times = []
+            for harvest in [lambda selector: [selector.harvest_best_beehive() for _ in range(HARVESTS)],
+                            lambda selector: selector.harvest_many(HARVESTS),
+                            lambda selector: selector.harvest_many(HARVESTS, per_step=True)]:
+                selector = BeehiveSelector(n)
+                selector.set_all_beehives([Beehive(*spec) for spec in specs])
+                start = perf_counter()
+                harvest(selector)
+                times.append(perf_counter() - start)
+            print('{0:>8} {1:>8} {2:16.3f} {3:16.3f} {4:16.3f}'.format(n, name, *times))
+
+
+def compare_update(sizes: list[int], changes: int = 1000) -> None:
+    print('{0:>8} {1:>14} {2:>14} {3:>16} {4:>16}'.format(
+        'n', 'rebuild (ms)', 'update (us)', 'harvest (us)', 'indexed (us)'))
+    for n in sizes:
+        specs = random_specs(n)
+        hives = [Beehive(*spec) for spec in specs]
+        plain, indexed = BeehiveSelector(n), BeehiveSelector(n, indexed=True)
+        plain.set_all_beehives(hives)
+        indexed.set_all_beehives(hives)
+        rounds = max(3, changes * 100 // n)
+        start = perf_counter()
+        for _ in range(rounds):
+            random.choice(hives).capacity = random.randint(1, 50)
+            plain.set_all_beehives(hives)
+        rebuild = (perf_counter() - start) / rounds
+
+        start = perf_counter()
+        for _ in range(changes):
+            hive = random.choice(hives)
+            hive.capacity = random.randint(1, 50)
+            indexed.update_beehive(hive)
+        update = (perf_counter() - start) / changes
+
+        harvests = []
+        for selector in (BeehiveSelector(n), BeehiveSelector(n, indexed=True)):
+            selector.set_all_beehives([Beehive(*spec) for spec in specs])
+            start = perf_counter()
+            for _ in range(changes * 100):
+                selector.harvest_best_beehive()
+            harvests.append((perf_counter() - start) / (changes * 100))
+        print('{0:>8} {1:14.3f} {2:14.3f} {3:16.3f} {4:16.3f}'.format(
+            n, rebuild * 1e3, update * 1e6, harvests[0] * 1e6, harvests[1] * 1e6))
+
+
+if __name__ == '__main__':
+    random.seed(0)
+    args = sys.argv[1:]
+    if '--replace' in args:
+        args.remove('--replace')
+        compare_replace([int(arg) for arg in args] or [10 ** 6])
+    elif '--update' in args:
+        args.remove('--update')
+        compare_update([int(arg) for arg in args] or [1000, 100000])
+    elif '--many' in args:
+        args.remove('--many')
+        compare_many([int(arg) for arg in args] or [1000, 100000])
+    else:
+        compare_emerald([int(arg) for arg in args] or [1000, 100000])
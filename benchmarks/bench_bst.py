@@ -0,0 +1,168 @@
+""" Benchmarks of BinarySearchTree.
+
+- AVLTree against BinarySearchTree for sorted and random insert orders.
+- The iterative BinarySearchTree operations against the recursive ones they replaced.
+- Bulk loading with from_items against one insert per key.
+
+Run from the repository root with ``python -m benchmarks.bench_bst [n ...]``.
+"""
+from __future__ import annotations
+
+import random
+import sys
+from time import perf_counter
+
+from bst import BinarySearchTree
+from avl import AVLTree
+from node import TreeNode
+
+
+class RecursiveBinarySearchTree(BinarySearchTree):
+    """ The recursive lookup, insertion, deletion and selection that BinarySearchTree used to have. """
+
+    def get_tree_node_by_key_aux(self, current, key):
+        if current is None:
+            raise KeyError('Key not found: {0}'.format(key))
+        elif key == current.key:
+            return current
+        elif key < current.key:
+            return self.get_tree_node_by_key_aux(current.left, key)
+        else:
+            return self.get_tree_node_by_key_aux(current.right, key)
+
+    def insert_aux(self, current, key, item):
+        if current is None:
+            current = TreeNode(key, item=item)
+            current.subtree_size -= 1
+            self.length += 1
+        elif key < current.key:
+            current.left = self.insert_aux(current.left, key, item)
+        elif key > current.key:
+            current.right = self.insert_aux(current.right, key, item)
+        else:
+            raise ValueError('Inserting duplicate item')
+        current.subtree_size += 1
+        return current
+
+    def delete_aux(self, current, key):
+        if current is None:
+            raise ValueError('Deleting non-existent item')
+        elif key < current.key:
+            current.left = self.delete_aux(current.left, key)
+        elif key > current.key:
+            current.right = self.delete_aux(current.right, key)
+        else:
+            if current.left is None:
+                self.length -= 1
+                return current.right
+            elif current.right is None:
+                self.length -= 1
+                return current.left
+            succ = self.get_successor(current)
+            current.key = succ.key
+            current.item = succ.item
+            current.right = self.delete_aux(current.right, succ.key)
+        current.subtree_size -= 1
+        return current
+
+    def kth_smallest(self, k, current):
+        if current is None:
+            raise ValueError('current node is None.')
+        left_size = current.left.subtree_size if current.left else 0
+        if k == left_size + 1:
+            return current
+        elif k < left_size + 1:
+            return self.kth_smallest(k, current.left)
+        if not current.right:
+            raise ValueError('Value of K is too large.')
+        return self.kth_smallest(k - left_size - 1, current.right)
+
+
+def time_inserts(tree_class, keys: list[int]) -> float:
+    """ Returns the seconds taken to insert every key into a fresh tree_class, and look up the median. """
+    start = perf_counter()
+    tree = tree_class()
+    for key in keys:
+        tree[key] = key
+    tree.kth_smallest(len(keys) // 2 + 1, tree.root)
+    return perf_counter() - start
+
+
+def time_operations(tree_class, keys: list[int]) -> dict[str, float]:
+    """ Returns the mean microseconds per insert, lookup, kth_smallest and delete over keys. """
+    timings = {}
+    tree = tree_class()
+
+    start = perf_counter()
+    for key in keys:
+        tree[key] = key
+    timings['insert'] = perf_counter() - start
+
+    start = perf_counter()
+    for key in keys:
+        tree[key]
+    timings['lookup'] = perf_counter() - start
+
+    start = perf_counter()
+    for k in range(1, len(keys) + 1):
+        tree.kth_smallest(k, tree.root)
+    timings['kth'] = perf_counter() - start
+
+    start = perf_counter()
+    for key in keys:
+        del tree[key]
+    timings['delete'] = perf_counter() - start
+
+    return {op: seconds / len(keys) * 1e6 for op, seconds in timings.items()}
+
+
+def compare_balancing(sizes: list[int]) -> None:
+    print('{0:>8} {1:>8} {2:>12} {3:>12}'.format('n', 'order', 'bst (s)', 'avl (s)'))
+    for n in sizes:
+        sorted_keys = list(range(n))
+        random_keys = sorted_keys[:]
+        random.shuffle(random_keys)
+        for order, keys in (('sorted', sorted_keys), ('random', random_keys)):
+            bst_time = time_inserts(BinarySearchTree, keys)
+            avl_time = time_inserts(AVLTree, keys)
+            print('{0:>8} {1:>8} {2:12.4f} {3:12.4f}'.format(n, order, bst_time, avl_time))
+
+
+def compare_iterative(sizes: list[int]) -> None:
+    print('{0:>8} {1:>8} {2:>16} {3:>16} {4:>8}'.format('n', 'op', 'recursive (us)', 'iterative (us)', 'speedup'))
+    for n in sizes:
+        keys = list(range(n))
+        random.shuffle(keys)
+        recursive = time_operations(RecursiveBinarySearchTree, keys)
+        iterative = time_operations(BinarySearchTree, keys)
+        for op in iterative:
+            print('{0:>8} {1:>8} {2:16.2f} {3:16.2f} {4:7.2f}x'.format(
+                n, op, recursive[op], iterative[op], recursive[op] / iterative[op]))
+
+
+def compare_bulk_load(sizes: list[int]) -> None:
+    print('{0:>8} {1:>8} {2:>14} {3:>14}'.format('n', 'tree', 'inserts (s)', 'from_items (s)'))
+    for n in sizes:
+        keys = list(range(n))
+        random.shuffle(keys)
+        for name, tree_class in (('bst', BinarySearchTree), ('avl', AVLTree)):
+            start = perf_counter()
+            tree = tree_class()
+            for key in keys:
+                tree[key] = key
+            inserts = perf_counter() - start
+
+            start = perf_counter()
+            tree_class.from_items((key, key) for key in keys)
+            bulk = perf_counter() - start
+            print('{0:>8} {1:>8} {2:14.4f} {3:14.4f}'.format(n, name, inserts, bulk))
+
+
+if __name__ == '__main__':
+    random.seed(0)
+    sizes = [int(arg) for arg in sys.argv[1:]] or [250, 500, 900, 5000, 20000]
+    compare_balancing(sizes)
+    print()
+    compare_iterative(sizes)
+    print()
+    compare_bulk_load(sizes)
@@ -0,0 +1,53 @@
+""" Benchmarks of MaxHeap.
+
+- add throughput and memory of a fixed heap sized to fit exactly, a fixed heap overprovisioned tenfold as
+  when the number of elements is not known up front, and a growable heap starting from a single slot.
+- Memory of a growable heap after draining 99% of its elements with get_max, with and without shrink.
+
+Run from the repository root with ``python -m benchmarks.bench_heap [n ...]``.
+"""
+from __future__ import annotations
+
+import random
+import sys
+import tracemalloc
+from time import perf_counter
+
+from heap import MaxHeap
+
+
+def build_and_drain(make_heap, items: list[float]) -> tuple[float, float, float]:
+    """
+    Adds the items one by one to a new heap, then removes 99% of them with get_max, returning the seconds the
+    adds took and the KiB the heap holds after the adds and after the get_max calls.
+    """
+    tracemalloc.start()
+    start = perf_counter()
+    heap = make_heap()
+    for item in items:
+        heap.add(item)
+    elapsed = perf_counter() - start
+    built = tracemalloc.get_traced_memory()[0]
+    for _ in range(len(items) - len(items) // 100):
+        heap.get_max()
+    drained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return elapsed, built / 2 ** 10, drained / 2 ** 10
+
+
+def compare_growth(sizes: list[int]) -> None:
+    print('{0:>8} {1:>14} {2:>12} {3:>12} {4:>16}'.format(
+        'n', 'heap', 'add (us)', 'KiB', 'drained (KiB)'))
+    for n in sizes:
+        items = [random.random() for _ in range(n)]
+        for name, make_heap in [('fixed n', lambda: MaxHeap(n)),
+                                ('fixed 10n', lambda: MaxHeap(10 * n)),
+                                ('growable', lambda: MaxHeap(1, growable=True)),
+                                ('shrink', lambda: MaxHeap(1, growable=True, shrink=True))]:
+            elapsed, built, drained = build_and_drain(make_heap, items)
+            print('{0:>8} {1:>14} {2:12.3f} {3:12.1f} {4:16.1f}'.format(n, name, elapsed / n * 1e6, built, drained))
+
+
+if __name__ == '__main__':
+    random.seed(0)
+    compare_growth([int(arg) for arg in sys.argv[1:]] or [10000, 100000, 1000000])
@@ -0,0 +1,60 @@
+""" Benchmark of the memory used per TreeNode and BeeNode.
+
+The current slotted nodes are compared against the __dict__-based dataclasses they replaced,
+which are reproduced below.
+
+Run from the repository root with ``python -m benchmarks.bench_memory [n]``.
+"""
+from __future__ import annotations
+
+import sys
+import tracemalloc
+from dataclasses import dataclass, field
+
+from node import TreeNode
+from threedeebeetree import BeeNode
+
+
+@dataclass
+class DictTreeNode:
+    key: object
+    item: object = None
+    left: object = None
+    right: object = None
+    subtree_size: int = 1
+
+
+@dataclass
+class DictBeeNode:
+    key: object
+    item: object
+    subtree_size: int = 1
+    nodes: dict = field(
+        default_factory=lambda: {"+++": None, "++-": None, "+-+": None, "+--": None,
+                                 "-++": None, "-+-": None, "--+": None, "---": None})
+
+
+def bytes_per_node(make_node, n: int) -> float:
+    """ Returns the mean number of bytes allocated by make_node(i), over n nodes kept alive together. """
+    keys = [(i, -i, i) for i in range(n)]  # allocated outside of the measurement
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    nodes = [make_node(key) for key in keys]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # the list holding the nodes costs one pointer per node, which is not part of the node
+    return (after - before - sys.getsizeof(nodes)) / len(nodes)
+
+
+def main(n: int) -> None:
+    print('{0:>10} {1:>16} {2:>16}'.format('node', 'before (B/node)', 'after (B/node)'))
+    rows = [
+        ('TreeNode', lambda key: DictTreeNode(key, key), lambda key: TreeNode(key, key)),
+        ('BeeNode', lambda key: DictBeeNode(key, key), lambda key: BeeNode(key, key)),
+    ]
+    for name, before, after in rows:
+        print('{0:>10} {1:16.1f} {2:16.1f}'.format(name, bytes_per_node(before, n), bytes_per_node(after, n)))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,170 @@
+""" Benchmarks of Percentiles.
+
+- ratio through BinarySearchTree.rank_range against the recursive bounded in-order walk it replaced, and
+  ratio_count against counting the items of ratio.
+- ``--mix``: the time per operation of each backend for workloads mixing ratio reads of the middle 1% with
+  add_point/remove_point writes, from write-heavy to read-heavy.
+- ``--sketch``: memory and accuracy of SketchPercentiles against the exact Percentiles, streaming the points
+  one add_point at a time: the observed rank error of the ratio_bounds cutoffs next to the reported
+  ratio_error, both in % of the points.
+
+- ``--cache``: repeated ratio calls on the same few (x, y), with one add_point and one remove_point between
+  rounds, with and without the cache, whose entries are then adjusted rather than recomputed.
+
+Run from the repository root with ``python -m benchmarks.bench_ratio [--mix | --sketch | --cache] [n ...]``.
+"""
+from __future__ import annotations
+
+import random
+import sys
+import tracemalloc
+from time import perf_counter
+
+from ratio import Percentiles, SketchPercentiles
+
+QUERIES = [(13, 10), (0, 42), (45, 45), (1, 1), (0, 0)]
+
+
+class RecursivePercentiles(Percentiles):
+    """ The ratio that Percentiles used to have: two kth_smallest() calls, then a recursive bounded walk. """
+
+    def ratio(self, x, y):
+        nth_smaller, nth_larger = self.rank_bounds(x, y)
+        if nth_larger < nth_smaller:
+            return []
+        _min = self.items.kth_smallest(nth_smaller, self.items.root).key
+        _max = self.items.kth_smallest(nth_larger, self.items.root).key
+
+        def inorder_aux_bounded(current, f):
+            if current is not None:
+                if current.key > _min:
+                    inorder_aux_bounded(current.left, f)
+                if _min <= current.key <= _max:
+                    f(current.item)
+                if current.key < _max:
+                    inorder_aux_bounded(current.right, f)
+
+        out = []
+        inorder_aux_bounded(self.items.root, lambda item: out.append(item))
+        return out
+
+
+def time_queries(query, repeat: int) -> float:
+    start = perf_counter()
+    for _ in range(repeat):
+        for x, y in QUERIES:
+            query(x, y)
+    return (perf_counter() - start) / (repeat * len(QUERIES))
+
+
+def compare_ratio(sizes: list[int]) -> None:
+    print('{0:>8} {1:>16} {2:>16} {3:>16} {4:>16}'.format(
+        'n', 'recursive (ms)', 'rank_range (ms)', 'len(ratio) (ms)', 'ratio_count (us)'))
+    for n in sizes:
+        points = random.sample(range(10 * n), n)
+        before = RecursivePercentiles.from_points(points, backend="avl")
+        after = Percentiles.from_points(points, backend="avl")
+        repeat = max(1, 20000 // n)
+        print('{0:>8} {1:16.3f} {2:16.3f} {3:16.3f} {4:16.3f}'.format(
+            n,
+            time_queries(before.ratio, repeat) * 1e3,
+            time_queries(after.ratio, repeat) * 1e3,
+            time_queries(lambda x, y: len(after.ratio(x, y)), repeat) * 1e3,
+            time_queries(after.ratio_count, repeat * 1000) * 1e6))
+
+
+def time_mix(backend: str, n: int, reads_per_write: int, operations: int) -> float:
+    points = random.sample(range(10 * n), n)
+    percentiles = Percentiles.from_points(points, backend=backend)
+    spare = iter(random.sample(range(10 * n, 20 * n), operations))
+    start = perf_counter()
+    for i in range(operations):
+        if i % (reads_per_write + 1) == 0:  # one write every reads_per_write + 1 operations
+            percentiles.remove_point(points[i])
+            points[i] = next(spare)
+            percentiles.add_point(points[i])
+        else:
+            percentiles.ratio(49, 50)
+    return (perf_counter() - start) / operations
+
+
+def compare_mix(sizes: list[int], mixes: tuple[int, ...] = (0, 1, 10, 100)) -> None:
+    print('{0:>8} {1:>12} '.format('n', 'reads/write') +
+          ' '.join('{0:>12}'.format(backend + ' (us)') for backend in Percentiles.BACKENDS))
+    for n in sizes:
+        operations = min(n, 2000000 // n + 100)
+        for reads_per_write in mixes:
+            print('{0:>8} {1:>12} '.format(n, reads_per_write) + ' '.join(
+                '{0:12.2f}'.format(time_mix(backend, n, reads_per_write, operations) * 1e6)
+                for backend in Percentiles.BACKENDS))
+
+
+def stream(percentiles, points: list[int]) -> tuple[float, float]:
+    """ Adds the points one by one, returning the seconds taken and the KiB still allocated afterwards. """
+    tracemalloc.start()
+    start = perf_counter()
+    for point in points:
+        percentiles.add_point(point)
+    elapsed = perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return elapsed, size / 2 ** 10
+
+
+def compare_sketch(sizes: list[int], ks: tuple[int, ...] = (100, 200, 800)) -> None:
+    print('{0:>8} {1:>8} {2:>10} {3:>10} {4:>12} {5:>12}'.format(
+        'n', 'mode', 'add (us)', 'KiB', 'error (%)', 'bound (%)'))
+    for n in sizes:
+        points = random.sample(range(10 * n), n)
+        ranks = {point: rank for rank, point in enumerate(sorted(points), 1)}
+        exact = Percentiles(backend="sorted")
+        elapsed, size = stream(exact, points)
+        print('{0:>8} {1:>8} {2:10.2f} {3:10.1f} {4:>12} {5:>12}'.format(
+            n, 'exact', elapsed / n * 1e6, size, '0', '0'))
+        for k in ks:
+            sketch = SketchPercentiles(k, seed=0)
+            elapsed, size = stream(sketch, points)
+            error = max(abs(ranks[approximate] - ranks[cutoff])
+                        for x, y in QUERIES
+                        for approximate, cutoff in zip(sketch.ratio_bounds(x, y), exact.ratio_bounds(x, y)))
+            print('{0:>8} {1:>8} {2:10.2f} {3:10.1f} {4:12.3f} {5:12.3f}'.format(
+                n, 'k=' + str(k), elapsed / n * 1e6, size, error / n * 100, sketch.ratio_error() / n * 100))
+
+
+def time_cache(backend: str, n: int, cache_size: int, rounds: int) -> float:
+    points = random.sample(range(10 * n), n)
+    percentiles = Percentiles.from_points(points, backend=backend, cache_size=cache_size)
+    spare = iter(random.sample(range(10 * n, 20 * n), rounds))
+    start = perf_counter()
+    for i in range(rounds):
+        percentiles.remove_point(points[i])
+        points[i] = next(spare)
+        percentiles.add_point(points[i])
+        for x, y in QUERIES[:3]:
+            percentiles.ratio(x, y)
+    return (perf_counter() - start) / rounds
+
+
+def compare_cache(sizes: list[int]) -> None:
+    print('{0:>8} {1:>8} {2:>14} {3:>14}'.format('n', 'backend', 'uncached (ms)', 'cached (ms)'))
+    for n in sizes:
+        rounds = max(10, 200000 // n)
+        for backend in Percentiles.BACKENDS:
+            print('{0:>8} {1:>8} {2:14.3f} {3:14.3f}'.format(
+                n, backend, time_cache(backend, n, 0, rounds) * 1e3, time_cache(backend, n, 3, rounds) * 1e3))
+
+
+if __name__ == '__main__':
+    random.seed(0)
+    args = sys.argv[1:]
+    if '--mix' in args:
+        args.remove('--mix')
+        compare_mix([int(arg) for arg in args] or [1000, 100000, 1000000])
+    elif '--cache' in args:
+        args.remove('--cache')
+        compare_cache([int(arg) for arg in args] or [1000, 10000, 100000])
+    elif '--sketch' in args:
+        args.remove('--sketch')
+        compare_sketch([int(arg) for arg in args] or [10000, 100000, 1000000])
+    else:
+        compare_ratio([int(arg) for arg in args] or [1000, 10000, 100000])
@@ -0,0 +1,182 @@
+""" Benchmarks of ThreeDeeBeeTree.
+
+- Insert and lookup throughput with integer octant codes, against the string octant keys they replaced.
+- Box queries with range_query and range_count, against a full scan of the points.
+- Deleting points one at a time, against rebuilding the tree without them.
+- k-nearest-neighbour search with nearest, against a brute force scan (``--nearest n ...`` runs only this,
+  e.g. ``--nearest 10000 100000 1000000``).
+
+Run from the repository root with ``python -m benchmarks.bench_threedeebeetree [n ...]``.
+"""
+from __future__ import annotations
+
+import heapq
+import random
+import sys
+from time import perf_counter
+
+from threedeebeetree import METRICS, BeeNode, ThreeDeeBeeTree
+
+STRING_OCTANTS = {"---": 0, "--+": 1, "-+-": 2, "-++": 3, "+--": 4, "+-+": 5, "++-": 6, "+++": 7}
+
+
+def string_octant(node: BeeNode, point) -> str:
+    """ The string octant key BeeNode.get_key() used to return. """
+    x_self, x_point = node.key[0], point[0]
+    y_self, y_point = node.key[1], point[1]
+    z_self, z_point = node.key[2], point[2]
+    return ("+" if x_self <= x_point else "-") + ("+" if y_self <= y_point else "-") + (
+        "+" if z_self <= z_point else "-")
+
+
+class StringOctantThreeDeeBeeTree(ThreeDeeBeeTree):
+    """ The recursive insertion and lookup through string octant keys that ThreeDeeBeeTree used to have. """
+
+    def get_tree_node_by_key_aux(self, current, key):
+        if current is None:
+            raise KeyError('Key not found: {0}'.format(key))
+        if key == current.key:
+            return current
+        return self.get_tree_node_by_key_aux(current.nodes[STRING_OCTANTS[string_octant(current, key)]], key)
+
+    def insert_aux(self, current, key, item):
+        if current is None:
+            current = BeeNode(key, item=item)
+            self.length += 1
+        elif key == current.key:
+            raise ValueError('Inserting duplicate item')
+        else:
+            k_ = STRING_OCTANTS[string_octant(current, key)]
+            current.subtree_size += 1
+            current.nodes[k_] = self.insert_aux(current.nodes[k_], key, item)
+        return current
+
+
+def random_points(n: int, spread: int = 10 ** 6) -> list[tuple[int, int, int]]:
+    """ Returns n distinct random points. """
+    points = set()
+    while len(points) < n:
+        points.add((random.randrange(spread), random.randrange(spread), random.randrange(spread)))
+    return list(points)
+
+
+def throughput(tree_class, points) -> tuple[float, float]:
+    """ Returns the inserts and lookups per second of tree_class over points. """
+    tree = tree_class()
+    start = perf_counter()
+    for i, point in enumerate(points):
+        tree[point] = i
+    inserts = len(points) / (perf_counter() - start)
+
+    start = perf_counter()
+    for point in points:
+        tree[point]
+    lookups = len(points) / (perf_counter() - start)
+    return inserts, lookups
+
+
+def compare_octant_codes(sizes: list[int]) -> None:
+    print('{0:>8} {1:>8} {2:>14} {3:>14} {4:>8}'.format('n', 'op', 'string (op/s)', 'int (op/s)', 'speedup'))
+    for n in sizes:
+        points = random_points(n)
+        before = throughput(StringOctantThreeDeeBeeTree, points)
+        after = throughput(ThreeDeeBeeTree, points)
+        for op, old, new in zip(('insert', 'lookup'), before, after):
+            print('{0:>8} {1:>8} {2:14.0f} {3:14.0f} {4:7.2f}x'.format(n, op, old, new, new / old))
+
+
+def compare_range_query(sizes: list[int], queries: int = 100) -> None:
+    print('{0:>8} {1:>10} {2:>14} {3:>16} {4:>16}'.format(
+        'n', 'box side', 'scan (ms)', 'range_query (ms)', 'range_count (ms)'))
+    spread = 10 ** 6
+    for n in sizes:
+        points = random_points(n, spread)
+        tree = ThreeDeeBeeTree()
+        for i, point in enumerate(points):
+            tree[point] = i
+        for side in (spread // 100, spread // 10, spread // 2):
+            boxes = []
+            for _ in range(queries):
+                lo = tuple(random.randrange(spread - side) for _ in range(3))
+                boxes.append((lo, tuple(c + side for c in lo)))
+
+            start = perf_counter()
+            for lo, hi in boxes:
+                [p for p in points if tree.in_box(p, lo, hi)]
+            scan = perf_counter() - start
+
+            start = perf_counter()
+            for lo, hi in boxes:
+                list(tree.range_query(lo, hi))
+            query = perf_counter() - start
+
+            start = perf_counter()
+            for lo, hi in boxes:
+                tree.range_count(lo, hi)
+            count = perf_counter() - start
+            print('{0:>8} {1:>10} {2:14.3f} {3:16.3f} {4:16.3f}'.format(
+                n, side, scan / queries * 1e3, query / queries * 1e3, count / queries * 1e3))
+
+
+def compare_delete(sizes: list[int], fraction: float = 0.01) -> None:
+    print('{0:>8} {1:>14} {2:>16} {3:>14}'.format('n', 'delete (ms)', 'delete root (ms)', 'rebuild (ms)'))
+    for n in sizes:
+        points = random_points(n)
+        tree = ThreeDeeBeeTree()
+        for i, point in enumerate(points):
+            tree[point] = i
+        victims = random.sample(points[1:], max(1, int(n * fraction)))
+
+        start = perf_counter()
+        for point in victims:
+            del tree[point]
+        delete = (perf_counter() - start) / len(victims)
+
+        start = perf_counter()
+        del tree[points[0]]
+        delete_root = perf_counter() - start
+
+        start = perf_counter()
+        rebuilt = ThreeDeeBeeTree()
+        for i, point in enumerate(points[1:]):
+            rebuilt[point] = i
+        rebuild = perf_counter() - start
+        print('{0:>8} {1:14.3f} {2:16.3f} {3:14.3f}'.format(n, delete * 1e3, delete_root * 1e3, rebuild * 1e3))
+
+
+def compare_nearest(sizes: list[int], k: int = 10, queries: int = 20) -> None:
+    print('{0:>8} {1:>10} {2:>16} {3:>14} {4:>8}'.format('n', 'metric', 'brute force (ms)', 'nearest (ms)', 'speedup'))
+    for n in sizes:
+        points = random_points(n)
+        tree = ThreeDeeBeeTree()
+        for i, point in enumerate(points):
+            tree[point] = i
+        targets = random_points(queries)
+        for metric, distance in METRICS.items():
+            start = perf_counter()
+            for x, y, z in targets:
+                heapq.nsmallest(k, points, key=lambda p: distance(abs(p[0] - x), abs(p[1] - y), abs(p[2] - z)))
+            brute = perf_counter() - start
+
+            start = perf_counter()
+            for target in targets:
+                tree.nearest(target, k, metric)
+            pruned = perf_counter() - start
+            print('{0:>8} {1:>10} {2:16.3f} {3:14.3f} {4:7.1f}x'.format(
+                n, metric, brute / queries * 1e3, pruned / queries * 1e3, brute / pruned))
+
+
+if __name__ == '__main__':
+    random.seed(0)
+    args = sys.argv[1:]
+    if args and args[0] == '--nearest':
+        compare_nearest([int(arg) for arg in args[1:]] or [10000, 100000, 1000000])
+    else:
+        sizes = [int(arg) for arg in args] or [1000, 10000, 100000]
+        compare_octant_codes(sizes)
+        print()
+        compare_range_query(sizes)
+        print()
+        compare_delete(sizes)
+        print()
+        compare_nearest(sizes)
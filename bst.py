@@ -8,7 +8,7 @@ from __future__ import annotations
 __author__ = 'Brendon Taylor, modified by Alexey Ignatiev, further modified by Jackson Goerner'
 __docformat__ = 'reStructuredText'
 
-from typing import TypeVar, Generic
+from typing import TypeVar, Generic, Iterable, Tuple
 from node import TreeNode
 import sys
 
@@ -31,6 +31,84 @@ class BinarySearchTree(Generic[K, I]):
         self.root = None
         self.length = 0
 
+    @classmethod
+    def from_items(cls, pairs: Iterable[Tuple[K, I]]) -> BinarySearchTree[K, I]:
+        """
+            Explain:
+            - Builds a perfectly balanced tree out of (key, item) pairs given in any order.
+            - The pairs are sorted once by key and handed to from_sorted().
+
+            Args:
+            - pairs, an iterable of (key, item) pairs
+
+            Raises:
+            - ValueError, if two pairs have the same key
+
+            Returns:
+            - a new tree holding every pair
+
+            Complexity:
+            - Worst case: O(CompK * N * log(N)), sorting the pairs
+            - Best case: O(CompK * N), the pairs are already sorted, which the sort detects in one pass
+       """
+        return cls.from_sorted(sorted(pairs, key=lambda pair: pair[0]))
+
+    @classmethod
+    def from_sorted(cls, pairs: Iterable[Tuple[K, I]]) -> BinarySearchTree[K, I]:
+        """
+            Explain:
+            - Builds a perfectly balanced tree out of (key, item) pairs sorted by increasing key, without a
+            single root-to-leaf insertion walk. The middle pair of every range becomes the root of its subtree.
+
+            Args:
+            - pairs, an iterable of (key, item) pairs sorted by key
+
+            Raises:
+            - ValueError, if the keys are not strictly increasing, i.e. unsorted or duplicated
+
+            Returns:
+            - a new tree holding every pair
+
+            Complexity:
+            - Worst case: O(CompK * N), one comparison per pair to validate the order, and one node per pair
+            - Best case: O(1), pairs is empty
+       """
+        pairs = list(pairs)
+        for i in range(1, len(pairs)):
+            if not pairs[i - 1][0] < pairs[i][0]:
+                raise ValueError('Keys must be unique and sorted: {0}, {1}'.format(pairs[i - 1][0], pairs[i][0]))
+
+        tree = cls()
+        tree.root = tree.build_aux(pairs, 0, len(pairs))
+        tree.length = len(pairs)
+        return tree
+
+    def build_aux(self, pairs: list[Tuple[K, I]], lo: int, hi: int) -> TreeNode | None:
+        """
+            Explain:
+            - Builds the balanced subtree holding pairs[lo:hi], setting subtree_size on every node.
+
+            Args:
+            - pairs, the sorted (key, item) pairs
+            - lo, the first index of the range
+            - hi, one past the last index of the range
+
+            Returns:
+            - the root of the subtree, or None for an empty range
+
+            Complexity:
+            - Worst case: O(hi - lo), one node per pair, with a recursion depth of only log(hi - lo)
+            - Best case: O(1), the range is empty
+       """
+        if lo >= hi:
+            return None
+        mid = (lo + hi) // 2
+        current = TreeNode(pairs[mid][0], item=pairs[mid][1])
+        current.left = self.build_aux(pairs, lo, mid)
+        current.right = self.build_aux(pairs, mid + 1, hi)
+        current.subtree_size = hi - lo
+        return current
+
     def is_empty(self) -> bool:
         """
             Explain:
@@ -155,6 +233,7 @@ class BinarySearchTree(Generic[K, I]):
         """
             Explain:
             - find the node by given key and current
+            - walks down from current in a loop, so deep trees cannot hit the recursion limit
 
             Args:
             - current = A Treenode which is the root of the tree
@@ -185,14 +264,14 @@ class BinarySearchTree(Generic[K, I]):
                     - thus it just have to compare for checking the key once and directly return.
                     - Return statement is constant time, O(1).
        """
-        if current is None:
-            raise KeyError('Key not found: {0}'.format(key))
-        elif key == current.key:
-            return current
-        elif key < current.key:
-            return self.get_tree_node_by_key_aux(current.left, key)
-        else:  # key > current.key
-            return self.get_tree_node_by_key_aux(current.right, key)
+        while current is not None:
+            if key == current.key:
+                return current
+            elif key < current.key:
+                current = current.left
+            else:  # key > current.key
+                current = current.right
+        raise KeyError('Key not found: {0}'.format(key))
 
     def __setitem__(self, key: K, item: I) -> None:
         """
@@ -220,6 +299,8 @@ class BinarySearchTree(Generic[K, I]):
         """
             Explain:
             - Attempts to insert an item into the tree, it uses the Key to insert it
+            - The insertion point is found with a loop that increments the subtree_size of every node it passes.
+            If the key turns out to be a duplicate, undo_insert_sizes() takes those increments back.
 
             Args:
             - current, TreeNode which is the root of the BST
@@ -247,20 +328,53 @@ class BinarySearchTree(Generic[K, I]):
                         - CompK is the complexity of comparing the keys
                         - All assignments, numerical operations, return statements are constant time, O(1).
        """
-        if current is None:  # base case: at the leaf
-            current = TreeNode(key, item=item)
-            current.subtree_size -= 1  # init() sets it to 1d already
+        new_node = TreeNode(key, item=item)
+        if current is None:  # empty tree: the new node is the root
             self.length += 1
-        elif key < current.key:
-            current.left = self.insert_aux(current.left, key, item)
-        elif key > current.key:
-            current.right = self.insert_aux(current.right, key, item)
-        else:  # key == current.key
-            raise ValueError('Inserting duplicate item')
-
-        current.subtree_size += 1
+            return new_node
+
+        parent = current
+        while True:
+            if key < parent.key:
+                parent.subtree_size += 1
+                if parent.left is None:
+                    parent.left = new_node
+                    break
+                parent = parent.left
+            elif key > parent.key:
+                parent.subtree_size += 1
+                if parent.right is None:
+                    parent.right = new_node
+                    break
+                parent = parent.right
+            else:  # key == parent.key
+                self.undo_insert_sizes(current, key)
+                raise ValueError('Inserting duplicate item')
+
+        self.length += 1
         return current
 
+    def undo_insert_sizes(self, current: TreeNode, key: K) -> None:
+        """
+            Explain:
+            - Decrements the subtree_size of every node on the path from current down to the node holding key,
+            excluding that node, i.e. the nodes insert_aux() incremented before it found a duplicate.
+
+            Args:
+            - current, TreeNode which is the root of the BST
+            - key, the duplicate key, which is known to be in the tree
+
+            Complexity:
+            - Worst case: O(CompK * D), where D is the depth of the node holding key
+            - Best case: O(CompK), the key is in the root
+       """
+        while key != current.key:
+            current.subtree_size -= 1
+            if key < current.key:
+                current = current.left
+            else:  # key > current.key
+                current = current.right
+
     def __delitem__(self, key: K) -> None:
         """
             Explain:
@@ -285,6 +399,9 @@ class BinarySearchTree(Generic[K, I]):
         """
             Explain:
             - Attempts to delete an item from the tree, it uses the Key to determine the node to delete.
+            - The node is found with a loop that decrements the subtree_size of every node it passes, which
+            undo_delete_sizes() takes back if the key is not there. A node with at most one child is spliced out,
+            otherwise its successor's key and item are moved into it and the successor is spliced out instead.
 
             Args:
             - current, TreeNode which is the root of the BST.
@@ -319,32 +436,63 @@ class BinarySearchTree(Generic[K, I]):
                         - this situation is similar to the best case of insert_aux()
 
        """
+        root = current
+        parent = None
+        while current is not None and key != current.key:
+            current.subtree_size -= 1
+            parent = current
+            if key < current.key:
+                current = current.left
+            else:  # key > current.key
+                current = current.right
         if current is None:
+            self.undo_delete_sizes(root, key)
             raise ValueError('Deleting non-existent item')
-        elif key < current.key:
-            current.left = self.delete_aux(current.left, key)
-        elif key > current.key:
-            current.right = self.delete_aux(current.right, key)
-        else:  # we found our key => do actual deletion
-            if self.is_leaf(current):
-                self.length -= 1
-                return None
-            elif current.left is None:
-                self.length -= 1
-                return current.right
-            elif current.right is None:
-                self.length -= 1
-                return current.left
-
-            # general case => find a successor
-            succ = self.get_successor(current)
+
+        # general case => find a successor, it has no left child, so it is the node that gets spliced out
+        if current.left is not None and current.right is not None:
+            current.subtree_size -= 1
+            parent = current
+            succ = current.right
+            while succ.left is not None:
+                succ.subtree_size -= 1
+                parent = succ
+                succ = succ.left
             current.key = succ.key
             current.item = succ.item
-            current.right = self.delete_aux(current.right, succ.key)
+            current = succ
+
+        # current has at most one child, which takes its place
+        child = current.left if current.left is not None else current.right
+        self.length -= 1
+        if parent is None:
+            return child
+        elif parent.left is current:
+            parent.left = child
+        else:
+            parent.right = child
+        return root
 
-        current.subtree_size -= 1
+    def undo_delete_sizes(self, current: TreeNode | None, key: K) -> None:
+        """
+            Explain:
+            - Increments the subtree_size of every node on the search path for key, which is known not to be
+            in the tree, i.e. the nodes delete_aux() decremented before it found the key missing.
 
-        return current
+            Args:
+            - current, TreeNode which is the root of the BST
+            - key, the missing key
+
+            Complexity:
+            - Worst case: O(CompK * D), where D is the depth of the tree
+            - Best case: O(1), the tree is empty
+       """
+        while current is not None:
+            current.subtree_size += 1
+            if key < current.key:
+                current = current.left
+            else:  # key > current.key
+                current = current.right
 
     def get_successor(self, current: TreeNode) -> TreeNode | None:
         """
@@ -384,7 +532,7 @@ class BinarySearchTree(Generic[K, I]):
     def get_minimal(self, current: TreeNode) -> TreeNode:
         """
             Explain:
-            - Get a node having the smallest key in the current sub-tree.
+            - Get a node having the smallest key in the current sub-tree, i.e. its leftmost node.
 
             Args:
             - current, a TreeNode.
@@ -402,17 +550,14 @@ class BinarySearchTree(Generic[K, I]):
                         all the nodes skewed, and the height of the tree is N.
 
             - Best case: O(1), when the current node is the minimal node
-                        - This only happens when the current node is a leaf, i.e. it does not have any child node.
+                        - This happens when the current node does not have a left child.
 
        """
         if current is None:
             raise ValueError('non existing item')
 
-        while self.is_leaf(current) is False:
-            if current.left is not None:
-                current = current.left
-            else:
-                current = current.right
+        while current.left is not None:
+            current = current.left
         return current
 
 
@@ -462,6 +607,7 @@ class BinarySearchTree(Generic[K, I]):
         """
             Explain:
             - Finds the kth smallest value by key in the subtree rooted at current.
+            - Descends from current in a loop, using subtree_size to decide which side the kth key is on.
 
             Args:
             - k, an integer which is the number of how smallest by key in the subtree.
@@ -479,28 +625,82 @@ class BinarySearchTree(Generic[K, I]):
                     - This happens when the current node is the root of the BST, and we have an unbalanced tree with
                     all the nodes skewed, and the height of the tree is N.
                     Then we have to traverse the tree from the root to the leaf,
-                    calling kth_smallest() N times, which gives us O(N) complexity.
+                    looping N times, which gives us O(N) complexity.
                 - Balanced tree: O(log(N)), where N is the total number of nodes in BST
                     - In this case, the height of the tree is log(N), and the node we are looking for is a leaf.
-                    - We have to traverse the tree from the root to the leaf, calling kth_smallest() log(N) times.
+                    - We have to traverse the tree from the root to the leaf, looping log(N) times.
 
             - Best case: O(1), when k gives us the root of the subtree.
                 -This occurs when k == current.left.subtree_size + 1, i.e. the root of the subtree is the kth smallest value.
                 -Then we just return current, which gives us complexity of O(1).
        """
-        if current is None:
-            raise ValueError('current node is None.')
+        while True:
+            if current is None:
+                raise ValueError('current node is None.')
 
-        if current.left:
-            left_size = current.left.subtree_size
-        else:
-            left_size = 0
+            if current.left:
+                left_size = current.left.subtree_size
+            else:
+                left_size = 0
 
-        if k == left_size + 1:
-            return current
-        elif k < left_size + 1:
-            return self.kth_smallest(k, current.left)
-        else:
-            if not current.right:
-                raise ValueError('Value of K is too large.')
-            return self.kth_smallest(k - left_size - 1, current.right)
\ No newline at end of file
+            if k == left_size + 1:
+                return current
+            elif k < left_size + 1:
+                current = current.left
+            else:
+                if not current.right:
+                    raise ValueError('Value of K is too large.')
+                k = k - left_size - 1
+                current = current.right
+
+    def rank_range(self, first: int, last: int) -> list[I]:
+        """
+            Explain:
+            - Returns the items of the first-th to the last-th smallest keys, both included and counted from 1,
+            in increasing order of key.
+            - Descends to the first-th node like kth_smallest(), keeping on an explicit stack every node where
+            the walk went left, i.e. every ancestor still to come in order. From there it walks in order with
+            that stack, and stops after exactly last - first + 1 items, without comparing a single key.
+
+            Args:
+            - first, the rank of the first item to return
+            - last, the rank of the last item to return
+
+            Raises:
+            - ValueError, if first is less than 1 or last is larger than the number of items.
+
+            Returns:
+            - a list of the items, empty if last < first.
+
+            Complexity:
+            - Worst case: O(D + O), where D is the depth of the tree and O = last - first + 1 is the number of
+            items returned; every node is pushed and popped once.
+            - Best case: O(1), last < first
+       """
+        if last < first:
+            return []
+        if first < 1 or last > len(self):
+            raise ValueError('Ranks out of range: {0}, {1}'.format(first, last))
+
+        stack = []
+        current, k = self.root, first
+        while True:  # descend to the first-th node, like kth_smallest()
+            left_size = current.left.subtree_size if current.left else 0
+            if k == left_size + 1:
+                break
+            elif k < left_size + 1:
+                stack.append(current)
+                current = current.left
+            else:
+                k -= left_size + 1
+                current = current.right
+
+        out = [current.item]
+        for _ in range(last - first):
+            current = current.right  # the next node is the leftmost of the right subtree, or the next ancestor
+            while current is not None:
+                stack.append(current)
+                current = current.left
+            current = stack.pop()
+            out.append(current.item)
+        return out
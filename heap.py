@@ -9,10 +9,24 @@ from referential_array import ArrayR, T
 
 class MaxHeap(Generic[T]):
     MIN_CAPACITY = 1
+    # a growable heap doubles its array when full, and halves it once it is at most a quarter full
+    GROWTH_FACTOR = 2
+    SHRINK_FACTOR = 4
 
-    def __init__(self, max_size: int) -> None:
+    def __init__(self, max_size: int, growable: bool = False, shrink: bool = False) -> None:
+        """ Creates an empty heap with room for max_size elements.
+            By default the heap is fixed and add() raises IndexError when it is full. A growable heap instead
+            doubles its array, so max_size is only the initial capacity, and add() is amortised O(log n).
+            With shrink, a growable heap also halves its array as it drains, never below max_size.
+            :raises ValueError: if shrink is asked for a fixed heap
+        """
+        if shrink and not growable:
+            raise ValueError('Only a growable heap can shrink')
         self.length = 0
-        self.the_array = ArrayR(max(self.MIN_CAPACITY, max_size) + 1)
+        self.growable = growable
+        self.shrink = shrink
+        self.min_capacity = max(self.MIN_CAPACITY, max_size)
+        self.the_array = ArrayR(self.min_capacity + 1)
 
     def __len__(self) -> int:
         return self.length
@@ -20,6 +34,31 @@ class MaxHeap(Generic[T]):
     def is_full(self) -> bool:
         return self.length + 1 == len(self.the_array)
 
+    def capacity(self) -> int:
+        """ Returns the number of elements the array can hold before it is full. """
+        return len(self.the_array) - 1
+
+    def resize(self, capacity: int) -> None:
+        """ Moves the elements to a new array with room for capacity elements.
+            Slots past the last element are not copied, which also drops the references they kept.
+            :pre: self.length <= capacity
+            :complexity: O(capacity) to allocate the new array
+        """
+        new_array = ArrayR(capacity + 1)
+        for i in range(1, self.length + 1):
+            new_array[i] = self.the_array[i]
+        self.the_array = new_array
+
+    def shrink_aux(self) -> None:
+        """ Halves the array of a shrinking heap once it is at most a quarter full, down to the initial capacity.
+            Halving at a quarter rather than a half leaves room to grow again, so that alternating add() and
+            get_max() around a boundary do not resize every time.
+            :complexity: O(1) amortised, O(n) for the resize itself
+        """
+        capacity = self.capacity()
+        if self.shrink and capacity > self.min_capacity and self.length * self.SHRINK_FACTOR <= capacity:
+            self.resize(max(self.min_capacity, capacity // self.GROWTH_FACTOR))
+
     def rise(self, k: int) -> None:
         """
         Rise element at index k to its correct position
@@ -34,9 +73,12 @@ class MaxHeap(Generic[T]):
     def add(self, element: T) -> bool:
         """
         Swaps elements while rising
+        :raises IndexError: if the heap is full and not growable
         """
         if self.is_full():
-            raise IndexError
+            if not self.growable:
+                raise IndexError
+            self.resize(self.capacity() * self.GROWTH_FACTOR)
 
         self.length += 1
         self.the_array[self.length] = element
@@ -80,12 +122,44 @@ class MaxHeap(Generic[T]):
         if self.length > 0:
             self.the_array[1] = self.the_array[self.length+1]
             self.sink(1)
+        self.shrink_aux()
+        return max_elt
+
+    def replace_max(self, element: T) -> T:
+        """ Remove (and return) the maximum element and add element in its place, with a single sink.
+            :complexity: O(log n) comparisons, instead of a sink and a rise for get_max() then add()
+        """
+        if self.length == 0:
+            raise IndexError
+
+        max_elt = self.the_array[1]
+        self.the_array[1] = element
+        self.sink(1)
         return max_elt
 
+    def decrease_top(self) -> None:
+        """ Restore the heap after the value of the maximum element was lowered in place.
+            :pre: the maximum element did not increase
+            :complexity: O(log n) comparisons for the sink
+        """
+        if self.length == 0:
+            raise IndexError
+        self.sink(1)
+
+    def peek_max(self) -> T:
+        """ Return the maximum element from the heap without removing it. """
+        if self.length == 0:
+            raise IndexError
+        return self.the_array[1]
+
     def heapify(self, an_array: ArrayR[T]) -> None:
         """
         Apply bottom-up heap construction in O(n) time.
+        A growable heap first grows its array to fit an_array, if needed.
         """
+        if self.growable and len(an_array) > self.capacity():
+            self.length = 0
+            self.resize(len(an_array))
         self.length = len(an_array)
         # copy an_array to self.the_array (shift by 1)
         for i in range(self.length):
@@ -96,6 +170,126 @@ class MaxHeap(Generic[T]):
             self.sink(i)
 
 
+class IndexedMaxHeap(MaxHeap[T]):
+    """ Max Heap that knows the index of each of its elements, so that any of them can be updated or removed.
+        Elements are their own handles: they are tracked by identity, and an element can only be in the heap
+        once. Every write of an element into the array also records its index in positions.
+    """
+
+    def __init__(self, max_size: int, growable: bool = False, shrink: bool = False) -> None:
+        super().__init__(max_size, growable, shrink)
+        self.positions = {}  # id(element) -> index of element in the_array
+
+    def __contains__(self, element: T) -> bool:
+        """ True if this very element is in the heap.
+            :complexity: O(1)
+        """
+        return id(element) in self.positions
+
+    def index_of(self, element: T) -> int:
+        """ Returns the index of element in the array.
+            :raises KeyError: if element is not in the heap
+            :complexity: O(1)
+        """
+        try:
+            return self.positions[id(element)]
+        except KeyError:
+            raise KeyError('Element not in heap: {0}'.format(element))
+
+    def rise(self, k: int) -> None:
+        """
+        Rise element at index k to its correct position, like MaxHeap.rise(), recording the new index of every
+        element it moves.
+        :pre: 1 <= k <= self.length
+        """
+        item = self.the_array[k]
+        while k > 1 and item > self.the_array[k // 2]:
+            parent = self.the_array[k // 2]
+            self.the_array[k] = parent
+            self.positions[id(parent)] = k
+            k = k // 2
+        self.the_array[k] = item
+        self.positions[id(item)] = k
+
+    def sink(self, k: int) -> None:
+        """ Make the element at index k sink to the correct position, like MaxHeap.sink(), recording the new index
+            of every element it moves.
+            :pre: 1 <= k <= self.length
+        """
+        item = self.the_array[k]
+
+        while 2 * k <= self.length:
+            max_child = self.largest_child(k)
+            child = self.the_array[max_child]
+            if child <= item:
+                break
+            self.the_array[k] = child
+            self.positions[id(child)] = k
+            k = max_child
+
+        self.the_array[k] = item
+        self.positions[id(item)] = k
+
+    def add(self, element: T) -> bool:
+        """
+        Adds element like MaxHeap.add().
+        :raises ValueError: if element is already in the heap
+        """
+        if element in self:
+            raise ValueError('Element already in heap: {0}'.format(element))
+        super().add(element)
+
+    def get_max(self) -> T:
+        """ Remove (and return) the maximum element from the heap. """
+        max_elt = super().get_max()
+        del self.positions[id(max_elt)]
+        return max_elt
+
+    def replace_max(self, element: T) -> T:
+        """ Remove (and return) the maximum element and add element in its place, with a single sink.
+            :raises ValueError: if element is already in the heap, other than as the maximum
+        """
+        if element in self and self.positions[id(element)] != 1:
+            raise ValueError('Element already in heap: {0}'.format(element))
+        if self.length > 0:
+            del self.positions[id(self.the_array[1])]
+        return super().replace_max(element)
+
+    def heapify(self, an_array: ArrayR[T]) -> None:
+        """
+        Apply bottom-up heap construction in O(n) time, then index every element.
+        :raises ValueError: if an element is given twice
+        """
+        super().heapify(an_array)
+        self.positions = {id(self.the_array[i]): i for i in range(1, self.length + 1)}
+        if len(self.positions) != self.length:
+            raise ValueError('Elements must be distinct')
+
+    def update(self, element: T) -> None:
+        """ Restore the heap after the value of element changed in place, in either direction.
+            :raises KeyError: if element is not in the heap
+            :complexity: O(log n), a rise or a sink
+        """
+        k = self.index_of(element)
+        self.rise(k)
+        self.sink(self.positions[id(element)])
+
+    def remove(self, element: T) -> None:
+        """ Remove element from the heap, filling its place with the last element.
+            :raises KeyError: if element is not in the heap
+            :complexity: O(log n), the last element rises or sinks from there
+        """
+        k = self.index_of(element)
+        del self.positions[id(element)]
+        last = self.the_array[self.length]
+        self.length -= 1
+        if k <= self.length:
+            self.the_array[k] = last
+            self.positions[id(last)] = k
+            self.update(last)
+        self.shrink_aux()
+
+
 if __name__ == '__main__':
     items = [ int(x) for x in input('Enter a list of numbers: ').strip().split() ]
     heap = MaxHeap(len(items))
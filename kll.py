@@ -0,0 +1,241 @@
+""" KLL Sketch ADT.
+    Defines a quantile sketch of a stream, after Karnin, Lang and Liberty, "Optimal Quantile Approximation in
+    Streams" (2016).
+    Values are kept in a hierarchy of compactors: a value in compactor h stands for 2**h values of the stream.
+    When a compactor is full it is sorted and every other value, starting at a random offset, is promoted to
+    the next one, so memory stays O(k) however long the stream is, at the cost of an approximate rank.
+"""
+
+from __future__ import annotations
+
+__docformat__ = 'reStructuredText'
+
+from math import ceil, sqrt
+from random import Random
+from typing import TypeVar, Generic, Iterable
+
+# generic types
+T = TypeVar('T')
+
+
+class KLLSketch(Generic[T]):
+    """ Approximate ranks and quantiles of a stream of comparable values in O(k) memory. """
+
+    # capacities of the compactors shrink geometrically by this factor from the top one down
+    CAPACITY_DECAY = 2 / 3
+    # no compactor holds fewer values than this
+    MIN_CAPACITY = 2
+    # number of standard deviations covered by rank_error(), ~99.7% of queries for a normal error
+    ERROR_SIGMAS = 3
+
+    def __init__(self, k: int = 200, seed: int | None = None) -> None:
+        """
+            Explain:
+            - Initialises an empty sketch whose top compactor holds k values.
+
+            Args:
+            - k, the capacity of the top compactor, trading memory for accuracy
+            - seed, seeds the random offsets of the compactions, for reproducible sketches
+
+            Raises:
+            - ValueError, if k is smaller than MIN_CAPACITY
+
+            Complexity:
+            - Worst case: O(1)
+            - Best case: O(1)
+       """
+        if k < self.MIN_CAPACITY:
+            raise ValueError('k must be at least {0}: {1}'.format(self.MIN_CAPACITY, k))
+        self.k = k
+        self.random = Random(seed)
+        self.compactors = [[]]
+        self.length = 0
+        self.retained = 0
+        self.max_retained = self.capacity(0)
+        self.variance = 0  # sum of the squared weights of the compactions so far
+        self.worst_error = 0  # sum of the weights of the compactions so far
+
+    @classmethod
+    def from_values(cls, values: Iterable[T], k: int = 200, seed: int | None = None) -> KLLSketch[T]:
+        """
+            Explain:
+            - Builds the sketch of a whole stream, one update() per value.
+
+            Complexity:
+            - Worst case: O(N * log(k)), amortised cost of update()
+            - Best case: O(N), values is shorter than the first compactor
+       """
+        sketch = cls(k, seed)
+        for value in values:
+            sketch.update(value)
+        return sketch
+
+    def __len__(self) -> int:
+        """
+            Explain:
+            - Returns the number of values seen in the stream, not the number retained.
+
+            Complexity:
+            - Worst case: O(1), return statement
+            - Best case: O(1), return statement
+       """
+        return self.length
+
+    def is_empty(self) -> bool:
+        """
+            Explain:
+            - Checks to see if no value has been seen yet
+
+            Complexity:
+            - Worst case: O(1), return statement
+            - Best case: O(1), return statement
+       """
+        return self.length == 0
+
+    def capacity(self, height: int) -> int:
+        """
+            Explain:
+            - Returns the number of values the compactor at height can hold before it is compacted: k for the
+            top compactor, shrinking by CAPACITY_DECAY for every level below it.
+
+            Complexity:
+            - Worst case: O(1), numerical operations
+            - Best case: O(1), numerical operations
+       """
+        depth = len(self.compactors) - height - 1
+        return max(self.MIN_CAPACITY, ceil(self.k * self.CAPACITY_DECAY ** depth))
+
+    def update(self, value: T) -> None:
+        """
+            Explain:
+            - Adds a value of the stream to the bottom compactor, compacting once the sketch is full.
+
+            Args:
+            - value, the value to add
+
+            Complexity:
+            - Worst case: O(k * log(k)), a full compactor is sorted
+            - Best case: O(1), appending to the bottom compactor
+            - Amortised: O(log(k)), a compaction of c values happens once every ~c updates
+       """
+        self.compactors[0].append(value)
+        self.length += 1
+        self.retained += 1
+        if self.retained >= self.max_retained:
+            self.compress()
+
+    def compress(self) -> None:
+        """
+            Explain:
+            - Compacts the lowest compactor that is over its capacity, adding a compactor on top if it was
+            the top one. Only one compactor is compacted per call, which is enough to free space.
+
+            Complexity:
+            - Worst case: O(k * log(k)), sorting the top compactor
+            - Best case: O(H), no compactor is over capacity, where H is the number of compactors
+       """
+        for height, compactor in enumerate(self.compactors):
+            if len(compactor) >= self.capacity(height):
+                if height + 1 == len(self.compactors):
+                    self.compactors.append([])
+                self.compactors[height + 1].extend(self.compact_aux(compactor, 1 << height))
+                break
+        self.retained = sum(len(compactor) for compactor in self.compactors)
+        self.max_retained = sum(self.capacity(height) for height in range(len(self.compactors)))
+
+    def compact_aux(self, compactor: list[T], weight: int) -> list[T]:
+        """
+            Explain:
+            - Sorts the compactor and takes every other value out of it, starting at a random offset, leaving
+            behind only the last value when there is an odd number of them.
+            - For any value q, an even count of values below q is exactly halved and doubled in weight, while an
+            odd count is off by one, rounded up or down with equal probability: each compaction adds an error of
+            0 or +-weight to a rank, with mean 0 and a variance of at most weight ** 2.
+
+            Args:
+            - compactor, the list of values to compact, modified in place
+            - weight, the number of stream values each value of the compactor stands for
+
+            Returns:
+            - the values promoted to the next compactor
+
+            Complexity:
+            - Worst case: O(C * log(C)), sorting the C values of the compactor
+            - Best case: O(C), the compactor is already sorted
+       """
+        leftover = [compactor.pop()] if len(compactor) % 2 else []
+        compactor.sort()
+        promoted = compactor[self.random.randint(0, 1)::2]
+        compactor[:] = leftover
+        self.variance += weight * weight
+        self.worst_error += weight
+        return promoted
+
+    def rank(self, value: T) -> int:
+        """
+            Explain:
+            - Estimates the number of values of the stream smaller than value.
+
+            Complexity:
+            - Worst case: O(CompK * k), every retained value is compared
+            - Best case: O(CompK * k), every retained value is compared
+       """
+        return sum((1 << height) * sum(1 for retained in compactor if retained < value)
+                   for height, compactor in enumerate(self.compactors))
+
+    def kth_smallest(self, k: int) -> T:
+        """
+            Explain:
+            - Estimates the k-th smallest value of the stream, counted from 1: the smallest retained value whose
+            cumulated weight, in increasing order, reaches k.
+
+            Args:
+            - k, the rank of the value
+
+            Raises:
+            - ValueError, if k is not between 1 and the number of values seen
+
+            Returns:
+            - a retained value whose true rank is within rank_error() of k
+
+            Complexity:
+            - Worst case: O(CompK * k * log(k)), the retained values are sorted
+            - Best case: O(1), k is out of range
+       """
+        if not 1 <= k <= self.length:
+            raise ValueError('Rank out of range: {0}'.format(k))
+        weighted = sorted((retained, 1 << height)
+                          for height, compactor in enumerate(self.compactors) for retained in compactor)
+        seen = 0
+        for retained, weight in weighted:
+            seen += weight
+            if seen >= k:
+                return retained
+        return weighted[-1][0]  # weights always add up to length, kept as a guard
+
+    def rank_error(self) -> int:
+        """
+            Explain:
+            - Returns a bound on the error of rank() and kth_smallest(), in number of values, holding with
+            ~99.7% confidence: the compactions add independent errors of mean 0, so the total has a standard
+            deviation of at most sqrt(variance).
+            - The bound is 0 as long as no compaction happened, and the estimates are then exact.
+
+            Complexity:
+            - Worst case: O(1), numerical operations
+            - Best case: O(1), numerical operations
+       """
+        return ceil(self.ERROR_SIGMAS * sqrt(self.variance))
+
+    def max_rank_error(self) -> int:
+        """
+            Explain:
+            - Returns the bound on the error of rank() and kth_smallest() that holds whatever the random offsets
+            were: every compaction being off by its full weight in the same direction. Usually much looser
+            than rank_error().
+
+            Complexity:
+            - Worst case: O(1), return statement
+            - Best case: O(1), return statement
+       """
+        return self.worst_error
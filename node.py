@@ -11,9 +11,9 @@ __author__ = 'Maria Garcia de la Banda and Brendon Taylor. Modified by Alexey Ig
 __docformat__ = 'reStructuredText'
 
 
-@dataclass
+@dataclass(slots=True)
 class TreeNode(Generic[K, I]):
-    """ Node class represent BST nodes. """
+    """ Node class represent BST nodes, slotted so that nodes carry no per-instance __dict__. """
 
     key: K
     item: I = None
@@ -33,3 +33,11 @@ class TreeNode(Generic[K, I]):
         key = str(self.key) if type(self.key) != str else "'{0}'".format(self.key)
         item = str(self.item) if type(self.item) != str else "'{0}'".format(self.item)
         return '({0}, {1}, [{2}])'.format(key, item, self.subtree_size)
+
+
+@dataclass(slots=True)
+class AVLTreeNode(TreeNode[K, I]):
+    """ Node class represent AVL tree nodes, which also track their height. """
+
+    # Height of the subtree rooted at this node, maintained by avl.py
+    height: int = 1
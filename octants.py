@@ -0,0 +1,110 @@
+""" Octants of ThreeDeeBeeTree.
+    Defines the point type, the octant codes that a node indexes its children by, and the split of a group of
+    points into the 8 octants around a balanced pivot, shared by ThreeDeeBeeTree and the orderings of balancing.
+"""
+
+from __future__ import annotations
+from bisect import bisect_left
+from math import ceil
+from operator import itemgetter
+from typing import Tuple
+
+Point = Tuple[int, int, int]
+
+# bits of an octant code, set when the point is on the positive side of the node along that axis
+OCTANT_X = 4
+OCTANT_Y = 2
+OCTANT_Z = 1
+
+ORDER_RATIO = 1 / 7 * 100  # get ratio in percent
+BASE_CASE_SIZE = 17  # groups this small are balanced whatever their order
+
+
+def sort_axes(points: list[Point]) -> tuple[list[Point], list[Point], list[Point]]:
+    """
+    Explain:
+        - Returns the points sorted along x, y and z, ties broken by the whole point so that every order is unique.
+        Points compare by x first, so they are their own x key. The y and z orders are stable sorts of the x order
+        by that one coordinate, which leaves ties in whole-point order without building a key tuple per point,
+        the bulk of the memory the orderings use.
+
+    Complexity: O(nlog(n)), three sorts.
+    """
+    by_x = sorted(points)
+    return by_x, sorted(by_x, key=itemgetter(1)), sorted(by_x, key=itemgetter(2))
+
+
+def select_pivot(by_x: list[Point], by_y: list[Point], by_z: list[Point]) -> Point:
+    """
+    Explain:
+        - Given the same points sorted along each axis, returns a point that leaves at least ORDER_RATIO percent of
+        the other points strictly below it, and as many at or above it, along every axis. Without repeated
+        coordinates, these are exactly the points that Percentiles.ratio(ORDER_RATIO, ORDER_RATIO) keeps on all
+        three axes; with them, points sharing the pivot's coordinate are counted on the side BeeNode puts them.
+        - The sides of a point along an axis are counted by binary search in that axis' sorted list. Candidates are
+        tried outwards from the x-median, so the most central suitable point along x is found without building
+        any set.
+        - An axis along which no point can be suitable is left out of the check: the value at the highest
+        suitable rank starts below the lowest one, so all suitable ranks share one coordinate. Without this, a
+        single such axis, e.g. points on a plane, makes every candidate fail.
+        - If no point is suitable, the x-median is returned.
+
+    Args:
+        - by_x, by_y, by_z: the points sorted along x, y and z.
+
+    Returns:
+        - the pivot point.
+
+    Complexity:
+        - Worst case: O(nlog(n)), every point is tried, e.g. when the axes can only be balanced one at a time.
+        - Best case: O(log(n)), the x-median is suitable.
+    """
+    n = len(by_x)
+    median = n // 2
+    min_side = ceil(ORDER_RATIO / 100 * n)
+
+    # an axis along which no point is suitable, e.g. one that all points share a coordinate of, is left out
+    axes = []
+    for axis, ordered in enumerate((by_x, by_y, by_z)):
+        if n - 1 - min_side >= min_side and \
+                bisect_left(ordered, ordered[n - 1 - min_side][axis], key=lambda _q: _q[axis]) >= min_side:
+            axes.append((axis, ordered))
+
+    def balanced(_p):
+        for axis, ordered in axes:
+            below = bisect_left(ordered, _p[axis], key=lambda _q: _q[axis])
+            if below < min_side or n - 1 - below < min_side:
+                return False
+        return True
+
+    for offset in range(median + 1):
+        for i in (median - offset, median + offset + 1):
+            if 0 <= i < n and balanced(by_x[i]):
+                return by_x[i]
+    return by_x[median]
+
+
+def partition_octants(points: list[Point], selected: Point) -> list[list[Point]]:
+    """
+    Explain:
+        - Splits points, leaving out selected, into the 8 octants around selected, indexed by the octant code of
+        BeeNode.get_key(). The split is stable, so each octant keeps the relative order of points.
+        - selected is left out as it goes past, by identity, so it does not have to be found and removed
+        first; it must be the very object in points.
+
+    Args:
+        - points: the points to split.
+        - selected: the point to split around.
+
+    Returns:
+        - a list of 8 lists of points.
+
+    Complexity: O(n), one pass over the points.
+    """
+    x, y, z = selected
+    octants = [[] for _ in range(8)]
+    appends = [octant.append for octant in octants]
+    for _p in points:
+        if _p is not selected:
+            appends[(x <= _p[0]) << 2 | (y <= _p[1]) << 1 | (z <= _p[2])](_p)
+    return octants
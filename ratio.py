@@ -1,16 +1,112 @@
 from __future__ import annotations
-from typing import Generic, TypeVar
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Generic, TypeVar, Iterable
 from math import ceil, floor
 from bst import BinarySearchTree
+from avl import AVLTree
+from sorted_array import SortedArray
+from kll import KLLSketch
 
 T = TypeVar("T")
 I = TypeVar("I")
 
 
+def rank_bounds(length: int, x, y) -> tuple[int, int]:
+    """
+        Explain:
+        - Computes the ranks, counted from 1, of the first and last of length points fitting the larger than/smaller
+        than criteria of ratio(x, y): at least x% of the points are smaller than the first, and at least y% larger
+        than the last. The range is empty when the last rank is smaller than the first.
+        - Shared by Percentiles and SketchPercentiles, which only differ in how they find the points of those ranks.
+
+        Args:
+        - length, the number of points
+        - x, the lower bound of the range in percentage
+        - y, the upper bound of the range in percentage
+
+        Returns:
+        - the ranks of the first and the last point of the range
+
+        Complexity:
+        - Worst case: O(1), numerical operations only
+        - Best case: O(1), numerical operations only
+   """
+    # nth_smaller is the first leftmost item that we want
+    # nth_larger is the last rightmost item that we want
+    nth_smaller = ceil(x / 100 * length) + 1
+    nth_larger = length - ceil(y / 100 * length)
+    return nth_smaller, nth_larger
+
+
 class Percentiles(Generic[T]):
 
-    def __init__(self) -> None:
-        self.items = BinarySearchTree()
+    # trees that can back the percentiles, selected by name at construction
+    BACKENDS = {
+        "bst": BinarySearchTree,
+        "avl": AVLTree,
+        "sorted": SortedArray,
+    }
+
+    def __init__(self, backend: str = "bst", cache_size: int = 0) -> None:
+        """
+            Explain:
+            - Initialises an empty collection of points stored in the chosen tree.
+            - "bst" is the plain BinarySearchTree, "avl" is the self-balancing AVLTree, which keeps add_point,
+            remove_point and ratio logarithmic even when points arrive in sorted order.
+            - "sorted" is a SortedArray, for workloads with many ratio() calls per update: ratio() is a single
+            slice, while add_point and remove_point shift part of the array, O(N) but in C.
+            - With a cache_size, the results of the last cache_size distinct ratio(x, y) calls are kept, see
+            ratio(). cache_hits and cache_misses count the ratio() calls answered from the cache or not.
+
+            Args:
+            - backend, the name of the tree to store the points in
+            - cache_size, the number of ratio() results to keep, 0 to disable the cache
+
+            Raises:
+            - ValueError, if the backend is not one of BACKENDS, or if cache_size is negative
+
+            Complexity:
+            - Worst case: O(1)
+            - Best case: O(1)
+       """
+        if backend not in self.BACKENDS:
+            raise ValueError('Unknown backend: {0}'.format(backend))
+        if cache_size < 0:
+            raise ValueError('cache_size must not be negative: {0}'.format(cache_size))
+        self.items = self.BACKENDS[backend]()
+        self.cache_size = cache_size
+        # (x, y) -> [first rank, last rank, items of those ranks], least recently used first
+        self.cache = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @classmethod
+    def from_points(cls, points: Iterable[T], backend: str = "bst", cache_size: int = 0) -> Percentiles[T]:
+        """
+            Explain:
+            - Builds the percentiles of a whole collection of points at once, with the backend tree bulk loaded
+            by from_items() instead of one add_point() per point.
+
+            Args:
+            - points, the points to store
+            - backend, the name of the tree to store the points in
+            - cache_size, the number of ratio() results to keep, 0 to disable the cache
+
+            Raises:
+            - ValueError, if the backend is not one of BACKENDS, if cache_size is negative, or if a point is given
+            twice
+
+            Returns:
+            - a new Percentiles holding every point
+
+            Complexity:
+            - Worst case: O(CompK * N * log(N)), sorting the points once
+            - Best case: O(CompK * N), the points are already sorted
+       """
+        percentiles = cls(backend, cache_size)
+        percentiles.items = cls.BACKENDS[backend].from_items((point, point) for point in points)
+        return percentiles
 
     def add_point(self, item: T):
         """
@@ -37,8 +133,11 @@ class Percentiles(Generic[T]):
             - Best case: O(BST.__setitem__())(best) = O(CompK) inserts the item at the root.
                         - CompK is the complexity of comparing the keys
                         - All assignments, numerical operations, return statements are constant time, O(1).
+            - Plus O(C * (log(N) + O)) to adjust the C cached results, see adjust_cache_aux().
        """
         self.items[item] = item
+        if self.cache:
+            self.adjust_cache_aux(item, 1)
 
     def remove_point(self, item: T):
         """
@@ -61,15 +160,31 @@ class Percentiles(Generic[T]):
                     - CompK is the complexity of comparing the keys
                     - All assignments, numerical operations, return statements are constant time, O(1).
             - Best case:  O(BST.__delitem__())(best) = O(Comp(K))
+            - Plus O(C * (log(N) + O)) to adjust the C cached results, see adjust_cache_aux().
        """
         del self.items[item]
+        if self.cache:
+            self.adjust_cache_aux(item, -1)
+
+    def rank_bounds(self, x, y) -> tuple[int, int]:
+        """
+            Explain:
+            - The ranks of the first and last points of ratio(x, y), see the module-level rank_bounds().
+
+            Complexity:
+            - Worst case: O(1), numerical operations only
+            - Best case: O(1), numerical operations only
+       """
+        return rank_bounds(len(self.items), x, y)
 
     def ratio(self, x, y):
         """
             Explain:
             - Computes a list of all items fitting the larger than/smaller than criteria.
-            - This list doesn't need to be sorted, but it is in this implementation, due to the nature of the BST,
-            and our usage of the inorder traversal.
+            - This list doesn't need to be sorted, but it is in this implementation, as the items are taken in
+            order of rank.
+            - The ranks of the range are computed by rank_bounds(), and the items are read off the tree by
+            rank_range(), which walks down to the first one and stops after the last one, without comparing keys.
 
             Args:
             - x, the lower bound of the range in percentage
@@ -82,88 +197,264 @@ class Percentiles(Generic[T]):
             for this implementation, we use the assumption that the BST is bounded by a time complexity of O(log(N)),
             as given by the assignment instructions.
 
-            - Expected complexity: (O(log(N)) + O(O * comp(f))) = O(log(N) + O)
-                - getting min/max (calling kth_smallest()): O(2 * log(N)) = O(log(N))
-                - calling inorder_aux_bounded(): O(O * comp(f)) as the average case
-                    - f, the callable function that is called on each item, is an append() function,
-                    and is assumed to be O(1).
-                - All assignments, numerical operations, return statements are constant time, O(1).
-
-            - Worst case: O(N)
-                - getting min/max (calling kth_smallest()): O(2 * log(N)) = O(log(N))
-                - calling inorder_aux_bounded(): O(N * comp(f)) when the entire tree is traversed through;
-                    that is, when x=0, y=0, implying that _min is the smallest item in the tree,
-                    and _max is the largest item in the tree.
-                f, the callable function that is called on each item, is an append() function, and is assumed to be O(1).
-
-                - All assignments, numerical operations, return statements are constant time, O(1).
+            - Expected complexity: O(log(N) + O), where O is the number of items returned
+                - rank_bounds(): O(1)
+                - rank_range(): O(log(N)) to reach the first item, then every node between the first and the last
+                item is pushed and popped once, O(O) in total.
 
-                Hence, the overall complexity is O(log(N) + N * comp(f)) = O(N * comp(f)) = O(N)
+            - Worst case: O(N), when x=0, y=0 and every item is returned.
 
             - Best case: O(1) if the range is empty
                 - this happens when x + y >= 100, in which case there will be no elements satisfying the criteria
                 we will then return an empty list, without having to traverse the tree.
-                - All assignments, numerical operations, return statements are constant time, O(1).
+
+            With the cache enabled, a cached result is returned as a copy, O(O) but without walking the tree, and
+            is moved to the most recently used end. A miss computes and caches the result, evicting the least
+            recently used one when the cache is full.
        """
+        if not self.cache_size:
+            nth_smaller, nth_larger = self.rank_bounds(x, y)
+            return self.items.rank_range(nth_smaller, nth_larger)
+
+        entry = self.cache.get((x, y))
+        if entry is not None:
+            self.cache_hits += 1
+            self.cache.move_to_end((x, y))
+            return entry[2][:]
+
+        self.cache_misses += 1
+        nth_smaller, nth_larger = self.rank_bounds(x, y)
+        out = self.items.rank_range(nth_smaller, nth_larger)
+        if len(self.cache) == self.cache_size:
+            self.cache.popitem(last=False)
+        self.cache[(x, y)] = [nth_smaller, nth_larger, out[:]]
+        return out
+
+    def adjust_cache_aux(self, point: T, change: int) -> None:
+        """
+            Explain:
+            - Brings every cached ratio() result up to date after point was added (change=1) or removed
+            (change=-1), instead of dropping them.
+            - The ranks an entry covers are first shifted: by change if point is smaller than all of its items,
+            not at all if it is larger, and otherwise point itself is inserted into or deleted from the items,
+            moving only the last rank. Adding or removing one point moves each bound of rank_bounds() by at
+            most one or two ranks, so the ends are then trimmed, or extended by rank_range() calls reading one
+            or two items each.
+            - An entry that is empty or no longer overlaps the new range cannot be adjusted this way, and is
+            dropped, to be recomputed by the next ratio(x, y).
 
-        # nth_smaller is the first leftmost item that we want
-        # nth_larger is the last rightmost item that we want
-        nth_smaller = ceil(x / 100 * len(self.items)) + 1
-        nth_larger = len(self.items) - ceil(y / 100 * len(self.items))
+            Args:
+            - point, the point just added to or removed from the tree
+            - change, 1 if the point was added, -1 if it was removed
+
+            Complexity:
+            - Worst case: O(C * (log(N) + O)), for each of the C entries, rank_range() reads at most two items
+            from each end, and inserting or deleting point shifts the O items of the entry, in C
+            - Best case: O(C), point is larger than every cached item and no bound moves
+       """
+        for key, entry in list(self.cache.items()):
+            first, last, out = entry
+            new_first, new_last = self.rank_bounds(*key)
+            if not out or new_last < new_first:
+                del self.cache[key]
+                continue
+
+            if point < out[0]:
+                first += change
+                last += change
+            elif not point > out[-1]:
+                if change > 0:
+                    out.insert(bisect_left(out, point), point)
+                else:
+                    del out[bisect_left(out, point)]
+                last += change
+
+            if new_first > last or new_last < first:
+                del self.cache[key]
+                continue
+            # trim or extend the last end first, so that the ranks of the first end stay valid
+            if new_last < last:
+                del out[new_last - last:]
+            elif new_last > last:
+                out.extend(self.items.rank_range(last + 1, new_last))
+            if new_first > first:
+                del out[:new_first - first]
+            elif new_first < first:
+                out[:0] = self.items.rank_range(new_first, first - 1)
+            entry[0], entry[1] = new_first, new_last
+
+    def ratio_count(self, x, y) -> int:
+        """
+            Explain:
+            - Computes the number of items ratio(x, y) would return, without returning them.
+
+            Args:
+            - x, the lower bound of the range in percentage
+            - y, the upper bound of the range in percentage
+
+            Returns:
+            - the number of items fitting within the bounds of x and y
 
-        # if nth_smaller > nth_larger, then there are no items in the range to return
+            Complexity:
+            - Worst case: O(1), the ranks are computed from the number of points only
+            - Best case: O(1), the ranks are computed from the number of points only
+       """
+        nth_smaller, nth_larger = self.rank_bounds(x, y)
+        return max(0, nth_larger - nth_smaller + 1)
+
+    def ratio_bounds(self, x, y) -> tuple[T, T] | None:
+        """
+            Explain:
+            - Computes the cutoff values of ratio(x, y): its first and last items, without the ones in between.
+
+            Args:
+            - x, the lower bound of the range in percentage
+            - y, the upper bound of the range in percentage
+
+            Returns:
+            - the smallest and the largest item fitting within the bounds of x and y, None if there is none
+
+            Complexity:
+            - Worst case: O(log(N)), two rank_range() calls returning one item each
+            - Best case: O(1), the range is empty
+       """
+        nth_smaller, nth_larger = self.rank_bounds(x, y)
         if nth_larger < nth_smaller:
-            return []
+            return None
+        return self.items.rank_range(nth_smaller, nth_smaller)[0], self.items.rank_range(nth_larger, nth_larger)[0]
 
-        # get the min and max values of the range using the kth_smallest method
-        _min = self.items.kth_smallest(nth_smaller, self.items.root).key
-        _max = self.items.kth_smallest(nth_larger, self.items.root).key
-
-        def inorder_aux_bounded(current: T, f) -> None:
-            """
-                Explain:
-                - Traverses through the BST in order, and calls the function f on each item. Inorder traversal
-                means that the left subtree is traversed first, then the current node, then the right subtree.
-                - However, we only traverse through the nodes that are within the range of _min and _max.
-                This means inorder is an efficient way to traverse through the BST, as we don't need to traverse
-                through the entire tree.
-                e.g. when current.key > _min, we don't need to traverse through the right subtree, as all the
-                items in the right subtree will be larger than _min, and thus not within the range.
-
-                Args:
-                - current, the current node in the BST
-                - f, the callable to call on each item
-
-                Returns:
-                - None
-
-                Complexity:
-
-                - Average complexity: O(O * comp(f)), where O is the number of items within the range; i.e. number
-                    of points that will be returned.
-
-                - Worst case: O(N * comp(f)) when the entire tree is traversed through, and all items are within the range.
-                    - This occurs when _min is the smallest item in the tree, and _max is the largest item in the tree.
-                    - comp(f) is the time complexity of the function f.
-                - Best case: O(1 * comp(f)) when in the first recursive call,
-                    _min <= current.key <= _max, as we don't need to traverse through the
-                    left and right subtrees.
-
-
-
-           """
-            if current is not None:  # if not a base case
-                if current.key > _min:
-                    inorder_aux_bounded(current.left, f)
-                if _min <= current.key <= _max:
-                    f(current.item)
-                if current.key < _max:
-                    inorder_aux_bounded(current.right, f)
-
-        out = []
-        # returns a list of all items in the range, that is also sorted
-        inorder_aux_bounded(self.items.root, lambda item: out.append(item))
-        return out
+
+class SketchPercentiles(Generic[T]):
+    """
+        Approximate percentiles of a stream of points, kept in a KLLSketch of O(k) values instead of a tree of
+        every point. Points can only be added, and the range of Percentiles.ratio(x, y) is only known by its
+        approximate cutoff values, from ratio_bounds(). The points themselves are recovered by rescan() over the
+        stream. The ranks of the range are computed by the same rank_bounds() as Percentiles.
+    """
+
+    def __init__(self, k: int = 200, seed: int | None = None) -> None:
+        """
+            Explain:
+            - Initialises an empty sketch of the points.
+
+            Args:
+            - k, the capacity of the top compactor of the sketch, see KLLSketch: memory is O(k) and the rank
+            error shrinks as O(N / k)
+            - seed, seeds the random compactions, for reproducible results
+
+            Complexity:
+            - Worst case: O(1)
+            - Best case: O(1)
+       """
+        self.items = KLLSketch(k, seed)
+
+    @classmethod
+    def from_points(cls, points: Iterable[T], k: int = 200, seed: int | None = None) -> SketchPercentiles[T]:
+        """
+            Explain:
+            - Builds the sketch of a whole stream of points, one add_point() per point.
+
+            Complexity:
+            - Worst case: O(N * log(k)), amortised cost of add_point()
+            - Best case: O(N), fewer points than the bottom compactor holds
+       """
+        percentiles = cls(k, seed)
+        percentiles.items = KLLSketch.from_values(points, k, seed)
+        return percentiles
+
+    def __len__(self) -> int:
+        """
+            Explain:
+            - Returns the number of points added so far.
+
+            Complexity:
+            - Worst case: O(1), return statement
+            - Best case: O(1), return statement
+       """
+        return len(self.items)
+
+    def add_point(self, item: T):
+        """
+            Explain:
+            - Adds a point to the sketch. Unlike Percentiles, adding the same point twice counts it twice.
+
+            Complexity:
+            - Worst case: O(k * log(k)), the point triggers a compaction
+            - Best case: O(1), appending to the bottom compactor
+       """
+        self.items.update(item)
+
+    def ratio_count(self, x, y) -> int:
+        """
+            Explain:
+            - Computes the number of points of ratio(x, y), exactly, as it only depends on the number of points.
+
+            Complexity:
+            - Worst case: O(1), the ranks are computed from the number of points only
+            - Best case: O(1), the ranks are computed from the number of points only
+       """
+        nth_smaller, nth_larger = rank_bounds(len(self.items), x, y)
+        return max(0, nth_larger - nth_smaller + 1)
+
+    def ratio_bounds(self, x, y) -> tuple[T, T] | None:
+        """
+            Explain:
+            - Estimates the cutoff values of ratio(x, y), the points of rank nth_smaller and nth_larger given by
+            rank_bounds(). The true rank of each cutoff is within ratio_error() of the exact one.
+
+            Args:
+            - x, the lower bound of the range in percentage
+            - y, the upper bound of the range in percentage
+
+            Returns:
+            - the approximate smallest and largest point fitting within the bounds of x and y, None if there is
+            none
+
+            Complexity:
+            - Worst case: O(k * log(k)), two KLLSketch.kth_smallest() calls
+            - Best case: O(1), the range is empty
+       """
+        nth_smaller, nth_larger = rank_bounds(len(self.items), x, y)
+        if nth_larger < nth_smaller:
+            return None
+        return self.items.kth_smallest(nth_smaller), self.items.kth_smallest(nth_larger)
+
+    def ratio_error(self) -> int:
+        """
+            Explain:
+            - Returns the number of ranks by which each cutoff of ratio_bounds() may be off, with ~99.7%
+            confidence, see KLLSketch.rank_error(). Divide by len(self) for the error in fraction of the points.
+
+            Complexity:
+            - Worst case: O(1)
+            - Best case: O(1)
+       """
+        return self.items.rank_error()
+
+    def rescan(self, x, y, points: Iterable[T]) -> list[T]:
+        """
+            Explain:
+            - Collects the points of ratio(x, y) from a second pass over the stream, keeping those between the
+            approximate cutoffs of ratio_bounds(). Each end of the result may miss or add up to ratio_error()
+            points compared to the exact ratio(x, y).
+
+            Args:
+            - x, the lower bound of the range in percentage
+            - y, the upper bound of the range in percentage
+            - points, the stream of points again
+
+            Returns:
+            - the points between the approximate cutoffs, in increasing order like Percentiles.ratio()
+
+            Complexity:
+            - Worst case: O(CompK * (N + O * log(O))), one comparison per point, then sorting the O points kept
+            - Best case: O(1), the range is empty and points is not read
+       """
+        bounds = self.ratio_bounds(x, y)
+        if bounds is None:
+            return []
+        low, high = bounds
+        return sorted(point for point in points if low <= point <= high)
 
 if __name__ == "__main__":
     points = list(range(50))
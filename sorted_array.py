@@ -0,0 +1,205 @@
+""" Sorted Array ADT.
+    Defines a sorted collection of (key, item) pairs kept in two parallel Python lists, with the same
+    interface as BinarySearchTree for the operations Percentiles uses.
+    Finding a rank is a single index, so reads are O(log(N)) binary searches or O(1) lookups, while each
+    insertion or deletion shifts the tail of the lists, O(N) but done by a single memmove in C.
+"""
+
+from __future__ import annotations
+
+__docformat__ = 'reStructuredText'
+
+from bisect import bisect_left
+from typing import TypeVar, Generic, Iterable, Tuple
+
+
+# generic types
+K = TypeVar('K')
+I = TypeVar('I')
+
+
+class SortedArray(Generic[K, I]):
+    """ Array of (key, item) pairs sorted by key, a read-optimised alternative to BinarySearchTree. """
+
+    def __init__(self) -> None:
+        """
+            Initialises an empty Sorted Array
+            :complexity: O(1)
+        """
+        self.keys = []
+        self.items = []
+
+    @classmethod
+    def from_items(cls, pairs: Iterable[Tuple[K, I]]) -> SortedArray[K, I]:
+        """
+            Explain:
+            - Builds a sorted array out of (key, item) pairs given in any order, like BinarySearchTree.from_items().
+
+            Args:
+            - pairs, an iterable of (key, item) pairs
+
+            Raises:
+            - ValueError, if two pairs have the same key
+
+            Returns:
+            - a new sorted array holding every pair
+
+            Complexity:
+            - Worst case: O(CompK * N * log(N)), sorting the pairs
+            - Best case: O(CompK * N), the pairs are already sorted, which the sort detects in one pass
+       """
+        return cls.from_sorted(sorted(pairs, key=lambda pair: pair[0]))
+
+    @classmethod
+    def from_sorted(cls, pairs: Iterable[Tuple[K, I]]) -> SortedArray[K, I]:
+        """
+            Explain:
+            - Builds a sorted array out of (key, item) pairs sorted by increasing key.
+
+            Args:
+            - pairs, an iterable of (key, item) pairs sorted by key
+
+            Raises:
+            - ValueError, if the keys are not strictly increasing, i.e. unsorted or duplicated
+
+            Returns:
+            - a new sorted array holding every pair
+
+            Complexity:
+            - Worst case: O(CompK * N), one comparison per pair to validate the order
+            - Best case: O(1), pairs is empty
+       """
+        array = cls()
+        for key, item in pairs:
+            if array.keys and not array.keys[-1] < key:
+                raise ValueError('Keys must be unique and sorted: {0}, {1}'.format(array.keys[-1], key))
+            array.keys.append(key)
+            array.items.append(item)
+        return array
+
+    def is_empty(self) -> bool:
+        """
+            Explain:
+            - Checks to see if the sorted array is empty
+
+            Complexity:
+            - Worst case: O(1), return statement
+            - Best case: O(1), return statement
+       """
+        return len(self) == 0
+
+    def __len__(self) -> int:
+        """
+            Explain:
+            - Returns the number of pairs in the sorted array.
+
+            Complexity:
+            - Worst case: O(1), return statement
+            - Best case: O(1), return statement
+       """
+        return len(self.keys)
+
+    def index_of(self, key: K) -> int:
+        """
+            Explain:
+            - Returns the index of key in the sorted array, found by binary search.
+
+            Raises:
+            - KeyError, if the key is not in the sorted array.
+
+            Complexity:
+            - Worst case: O(CompK * log(N)), binary search
+            - Best case: O(CompK * log(N)), binary search
+       """
+        index = bisect_left(self.keys, key)
+        if index == len(self.keys) or self.keys[index] != key:
+            raise KeyError('Key not found: {0}'.format(key))
+        return index
+
+    def __contains__(self, key: K) -> bool:
+        """
+            Explain:
+            - Checks to see if the key is in the sorted array
+
+            Complexity:
+            - Worst case: O(CompK * log(N)), binary search
+            - Best case: O(CompK * log(N)), binary search
+       """
+        try:
+            self.index_of(key)
+        except KeyError:
+            return False
+        return True
+
+    def __getitem__(self, key: K) -> I:
+        """
+            Explain:
+            - Returns the item stored with key.
+
+            Raises:
+            - KeyError, if the key is not in the sorted array.
+
+            Complexity:
+            - Worst case: O(CompK * log(N)), binary search
+            - Best case: O(CompK * log(N)), binary search
+       """
+        return self.items[self.index_of(key)]
+
+    def __setitem__(self, key: K, item: I) -> None:
+        """
+            Explain:
+            - Inserts the pair at the index found by binary search, shifting the larger keys one place up.
+
+            Raises:
+            - ValueError, if the key is already in the sorted array, like BinarySearchTree
+
+            Complexity:
+            - Worst case: O(CompK * log(N) + N), inserting the smallest key shifts every pair
+            - Best case: O(CompK * log(N)), inserting the largest key shifts nothing
+       """
+        index = bisect_left(self.keys, key)
+        if index < len(self.keys) and self.keys[index] == key:
+            raise ValueError('Inserting duplicate item')
+        self.keys.insert(index, key)
+        self.items.insert(index, item)
+
+    def __delitem__(self, key: K) -> None:
+        """
+            Explain:
+            - Deletes the pair with key, shifting the larger keys one place down.
+
+            Raises:
+            - ValueError, if the key is not in the sorted array, like BinarySearchTree
+
+            Complexity:
+            - Worst case: O(CompK * log(N) + N), deleting the smallest key shifts every pair
+            - Best case: O(CompK * log(N)), deleting the largest key shifts nothing
+       """
+        try:
+            index = self.index_of(key)
+        except KeyError:
+            raise ValueError('Deleting non-existent item')
+        del self.keys[index]
+        del self.items[index]
+
+    def rank_range(self, first: int, last: int) -> list[I]:
+        """
+            Explain:
+            - Returns the items of the first-th to the last-th smallest keys, both included and counted from 1,
+            in increasing order of key, like BinarySearchTree.rank_range(): a single slice.
+
+            Raises:
+            - ValueError, if first is less than 1 or last is larger than the number of pairs.
+
+            Returns:
+            - a list of the items, empty if last < first.
+
+            Complexity:
+            - Worst case: O(O), where O = last - first + 1 is the number of items returned, copied in C
+            - Best case: O(1), last < first
+       """
+        if last < first:
+            return []
+        if first < 1 or last > len(self):
+            raise ValueError('Ranks out of range: {0}, {1}'.format(first, last))
+        return self.items[first - 1:last]
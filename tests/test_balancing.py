@@ -4,13 +4,19 @@ from ed_utils.decorators import number, visibility
 from ed_utils.timeout import timeout
 
 from threedeebeetree import ThreeDeeBeeTree, BeeNode
-from balancing import make_ordering
+import balancing
+from balancing import make_ordering, iter_ordering
 
 def get_size(node):
     if node is None:
         return 0
     return node.subtree_size
 
+def get_depth(node):
+    if node is None:
+        return 0
+    return 1 + max(get_depth(child) for child in node.nodes)
+
 # Testing function to calculate the worst ratio on your 3️⃣🇩🐝🌳
 def collect_worst_ratio(node: BeeNode):
     default = (1, 0, "")
@@ -122,3 +128,190 @@ class TestBalancing(unittest.TestCase):
         
         ratio, smaller, axis = collect_worst_ratio(tdbt.root)
         self.assertLessEqual(ratio, 7, f"Axis {axis} has ratio 1:{ratio}.")
+
+    @timeout()
+    @number("4.3")
+    def test_auto_balance(self):
+        random.seed(5150)
+        diagonal = [(i, i, i) for i in range(1200)]
+        skewed = [(i, random.randint(0, 10 ** 6), -i) for i in range(1200)]
+        for points in (diagonal, skewed):
+            tdbt = ThreeDeeBeeTree(auto_balance=True)
+            for i, p in enumerate(points):
+                tdbt[p] = i
+            for p in points[::4]:
+                del tdbt[p]
+
+            ratio, smaller, axis = collect_worst_ratio(tdbt.root)
+            self.assertLessEqual(ratio, 7, f"Axis {axis} has ratio 1:{ratio}.")
+            # a node is only checked once its slack runs out, so the slack must never overstate its margin
+            for node in tdbt.subtree_nodes(tdbt.root):
+                self.assertLessEqual(node.balance_slack, tdbt.balance_margin(node))
+            self.assertEqual(len(tdbt), 900)
+            self.assertEqual(tdbt.root.subtree_size, 900)
+            for i, p in enumerate(points):
+                self.assertEqual(p in tdbt, i % 4 != 0)
+            self.assertEqual(tdbt[points[-1]], len(points) - 1)
+
+        # no pivot balances z on a plane, nor x and y on an axis line: rebuilding the unbalanced root on every
+        # insertion would take quadratic time, far past the timeout
+        planar = list({(random.randint(0, 10 ** 6), random.randint(0, 10 ** 6), 0) for _ in range(3000)})
+        axis_line = [(0, 0, i) for i in range(3000)]
+        for points in (planar, axis_line):
+            tdbt = ThreeDeeBeeTree(auto_balance=True)
+            for i, p in enumerate(points):
+                tdbt[p] = i
+            for p in points[::4]:
+                del tdbt[p]
+
+            self.assertEqual(len(tdbt), len(points) - len(points[::4]))
+            self.assertEqual(tdbt.root.subtree_size, len(tdbt))
+            self.assertLess(get_depth(tdbt.root), 40)
+            for i, p in enumerate(points):
+                self.assertEqual(p in tdbt, i % 4 != 0)
+
+    @timeout()
+    @number("4.4")
+    def test_methods(self):
+        random.seed(602214)
+        points = list({(random.randint(0, 200), random.randint(0, 200), random.randint(0, 200)) for _ in range(3000)})
+        points += [(1000 + i, 1000 + i, 1000 + i) for i in range(300)]  # a collinear cluster
+
+        for method in ("select", "percentiles"):
+            ordering = make_ordering(points[:], method=method)
+            self.assertEqual(len(ordering), len(points))
+            self.assertSetEqual(set(ordering), set(points))
+
+        # select_pivot() counts repeated coordinates on the side the tree puts them, so it stays balanced here
+        tdbt = ThreeDeeBeeTree()
+        for i, p in enumerate(make_ordering(points, method="select")):
+            tdbt[p] = i
+        ratio, smaller, axis = collect_worst_ratio(tdbt.root)
+        self.assertLessEqual(ratio, 7, f"Axis {axis} has ratio 1:{ratio}.")
+
+        with self.assertRaises(ValueError):
+            make_ordering(points, method="median")
+
+    @unittest.skipIf(balancing.np is None, "NumPy is not installed")
+    @timeout()
+    @number("4.5")
+    def test_numpy(self):
+        random.seed(10239123)
+        points = []
+        coords = list(range(10000))
+        random.shuffle(coords)
+        for i in range(3000):
+            points.append((coords[3*i], coords[3*i+1], coords[3*i+2]))
+        points += [(20000 + i // 3, 20000 + i, -i) for i in range(600)]  # repeated x coordinates
+
+        ordering = make_ordering(points, method="numpy")
+        self.assertEqual(len(ordering), len(points))
+        self.assertSetEqual(set(ordering), set(points))
+        self.assertTrue(all(type(p) is tuple for p in ordering))
+
+        tdbt = ThreeDeeBeeTree()
+        for i, p in enumerate(ordering):
+            tdbt[p] = i
+        ratio, smaller, axis = collect_worst_ratio(tdbt.root)
+        self.assertLessEqual(ratio, 7, f"Axis {axis} has ratio 1:{ratio}.")
+
+        self.assertListEqual(make_ordering(points[:5], method="numpy"), points[:5])
+
+    @timeout()
+    @number("4.6")
+    def test_parallel(self):
+        random.seed(31415)
+        points = list({(random.randint(0, 10 ** 5), random.randint(0, 10 ** 5), random.randint(0, 10 ** 5))
+                       for _ in range(3000)})
+        points += [(i, i, i) for i in range(-400, 0)]  # a collinear run, which unbalances the first octants
+
+        threshold = balancing.PARALLEL_THRESHOLD
+        balancing.PARALLEL_THRESHOLD = 100  # small enough to split these points over the workers
+        try:
+            methods = ["select", "percentiles"] + (["numpy"] if balancing.np is not None else [])
+            for method in methods:
+                self.assertListEqual(make_ordering(points[:], method=method, workers=2),
+                                     make_ordering(points[:], method=method))
+        finally:
+            balancing.PARALLEL_THRESHOLD = threshold
+
+        with self.assertRaises(ValueError):
+            make_ordering(points, workers=0)
+
+    @timeout()
+    @number("4.7")
+    def test_rebuild(self):
+        random.seed(10239123)
+        coords = list(range(10000))
+        random.shuffle(coords)
+        points = [(coords[3*i], coords[3*i+1], coords[3*i+2]) for i in range(3000)]
+        points += [(20000 + i // 3, 20000 + i, -i) for i in range(600)]  # repeated x coordinates
+
+        tdbt = ThreeDeeBeeTree()
+        for i, p in enumerate(points):
+            tdbt[p] = i
+        tdbt.root = tdbt.rebuild(list(tdbt.subtree_nodes(tdbt.root)))
+        ratio, smaller, axis = collect_worst_ratio(tdbt.root)
+        self.assertLessEqual(ratio, 7, f"Axis {axis} has ratio 1:{ratio}.")
+        for node in tdbt.subtree_nodes(tdbt.root):
+            self.assertEqual(node.unbalanced_size, 0)
+            self.assertLessEqual(node.balance_slack, tdbt.balance_margin(node))
+
+    @timeout()
+    @number("4.8")
+    def test_degenerate(self):
+        axis_line = [(0, 0, i) for i in range(3000)]  # no pivot can split x or y, only z
+        collinear = [(i, i, i) for i in range(3000)]
+
+        def depth(node):
+            return 0 if node is None else 1 + max(depth(child) for child in node.nodes)
+
+        methods = ["select", "percentiles"] + (["numpy"] if balancing.np is not None else [])
+        for points in (axis_line, collinear):
+            for method in methods:
+                ordering = make_ordering(points[:], method=method)
+                self.assertSetEqual(set(ordering), set(points))
+
+                tdbt = ThreeDeeBeeTree()
+                for i, p in enumerate(ordering):
+                    tdbt[p] = i
+                self.assertLess(depth(tdbt.root), 40, method)
+                if points is collinear:
+                    ratio, smaller, axis = collect_worst_ratio(tdbt.root)
+                    self.assertLessEqual(ratio, 7, f"{method}: axis {axis} has ratio 1:{ratio}.")
+
+    @timeout()
+    @number("4.9")
+    def test_iter_ordering(self):
+        random.seed(1618)
+        points = list({(random.randint(0, 999), random.randint(0, 999), random.randint(0, 999)) for _ in range(2000)})
+
+        methods = ["select", "percentiles"] + (["numpy"] if balancing.np is not None else [])
+        for method in methods:
+            ordering = make_ordering(points[:], method=method)
+            iterator = iter_ordering(points[:], method=method)
+            self.assertEqual(next(iterator), ordering[0])
+            self.assertListEqual([ordering[0]] + list(iterator), ordering)
+
+        with self.assertRaises(ValueError):
+            iter_ordering(points, method="median")  # raised on the call, not on the first next()
+
+    @timeout()
+    @number("4.10")
+    def test_parallel_split(self):
+        random.seed(27182)
+        points = list({(random.randint(0, 10 ** 6), random.randint(0, 10 ** 6), random.randint(0, 10 ** 6))
+                       for _ in range(40000)})
+        workers = 32
+        share = -(-len(points) // workers)
+        for method in ("select", "percentiles"):
+            segments, jobs = balancing.split_for_workers(points, method, workers)
+            pivots = [segment[0] for segment in segments if isinstance(segment, tuple)]
+            sent = [point for job in jobs for group in job for point in group]
+
+            # every point but the pivots is ordered in the pool, in jobs of about an even share each
+            self.assertEqual(len(sent), len(points) - len(pivots))
+            self.assertSetEqual(set(sent) | set(pivots), set(points))
+            self.assertLess(len(pivots), workers * 8)
+            self.assertTrue(all(sum(len(group) for group in job) <= share for job in jobs))
+            self.assertLess(len(jobs), 2 * workers)
@@ -1,8 +1,10 @@
+import random
 import unittest
 from ed_utils.decorators import number, visibility
 from ed_utils.timeout import timeout
 
 from beehive import BeehiveSelector, Beehive
+from heap import MaxHeap
 
 class TestBeehiveSelector(unittest.TestCase):
 
@@ -47,3 +49,132 @@ class TestBeehiveSelector(unittest.TestCase):
         for actual, ex in zip(all_emeralds, expected):
             self.assertAlmostEqual(actual, ex, 0)
         
+
+    @timeout()
+    @number("5.2")
+    def test_harvest_in_place(self):
+        random.seed(90210)
+        hives = [
+            Beehive(i, i, i, capacity=random.randint(1, 20), nutrient_factor=random.randint(1, 9),
+                    volume=random.randrange(200))
+            for i in range(300)
+        ]
+        s = BeehiveSelector(len(hives))
+        s.set_all_beehives(hives)
+        for _ in range(2000):
+            # the emerald harvested is always the best one left
+            best = max(hive.emerald for hive in hives)
+            self.assertEqual(s.harvest_best_beehive(), best)
+        self.assertEqual(len(s.heap), len(hives))
+
+        heap = MaxHeap(10)
+        with self.assertRaises(IndexError):
+            heap.replace_max(1)
+        heap.heapify([5, 9, 2, 7])
+        self.assertEqual(heap.replace_max(3), 9)
+        self.assertEqual([heap.get_max() for _ in range(4)], [7, 5, 3, 2])
+
+    @timeout()
+    @number("5.3")
+    def test_harvest_many(self):
+        random.seed(4242)
+        specs = [
+            (i, i, i, random.randint(0, 6), random.randint(0, 5), random.randint(0, 40))
+            for i in range(50)
+        ]
+        one_by_one, batched = BeehiveSelector(len(specs)), BeehiveSelector(len(specs))
+        one_by_one.set_all_beehives([Beehive(*spec) for spec in specs])
+        batched.set_all_beehives([Beehive(*spec) for spec in specs])
+        for n in [0, 1, 7, 100, 500]:
+            expected = [one_by_one.harvest_best_beehive() for _ in range(n)]
+            self.assertEqual(batched.harvest_many(n, per_step=True), (sum(expected), expected))
+            self.assertListEqual(
+                [hive.volume for hive in batched.heap.the_array[1:len(specs) + 1]],
+                [hive.volume for hive in one_by_one.heap.the_array[1:len(specs) + 1]],
+            )
+        self.assertEqual(batched.harvest_many(10), sum(one_by_one.harvest_best_beehive() for _ in range(10)))
+
+        # b4 is harvested 10 times in a row, in one step
+        s = BeehiveSelector(2)
+        s.add_beehive(Beehive(25, 22, 23, capacity=15, nutrient_factor=8, volume=10))
+        s.add_beehive(Beehive(45, 42, 43, capacity=1, nutrient_factor=85, volume=10))
+        self.assertEqual(s.harvest_many(11, per_step=True), (930, [85] * 10 + [80]))
+        with self.assertRaises(IndexError):
+            BeehiveSelector(1).harvest_many(1)
+
+    @timeout()
+    @number("5.4")
+    def test_update_remove(self):
+        random.seed(31337)
+        hives = [
+            Beehive(i, i, i, capacity=random.randint(1, 20), nutrient_factor=random.randint(1, 9),
+                    volume=random.randrange(200))
+            for i in range(100)
+        ]
+        s = BeehiveSelector(len(hives), indexed=True)
+        s.set_all_beehives(hives[:80])
+        for hive in hives[80:]:
+            s.add_beehive(hive)
+
+        live = list(hives)
+        removed = []
+        for step in range(150):
+            hive = random.choice(live)
+            if step % 3 == 0:
+                removed.append(hive)
+                s.remove_beehive(hive)
+                live.remove(hive)
+                self.assertNotIn(hive, s)
+            else:
+                hive.capacity = random.randint(1, 20)
+                hive.nutrient_factor = random.randint(1, 9)
+                s.update_beehive(hive)
+                self.assertIn(hive, s)
+            best = max(hive.emerald for hive in live)
+            self.assertEqual(s.harvest_best_beehive(), best)
+        self.assertEqual(len(s.heap), len(live))
+
+        with self.assertRaises(KeyError):
+            s.remove_beehive(removed[0])
+        with self.assertRaises(ValueError):
+            BeehiveSelector(1).update_beehive(hives[0])
+
+    @timeout()
+    @number("5.5")
+    def test_growable(self):
+        with self.assertRaises(IndexError):
+            fixed = MaxHeap(2)
+            for item in range(3):
+                fixed.add(item)
+        with self.assertRaises(ValueError):
+            MaxHeap(2, shrink=True)
+
+        heap = MaxHeap(2, growable=True, shrink=True)
+        for item in range(100):
+            heap.add(item)
+        self.assertEqual(len(heap), 100)
+        self.assertEqual(heap.capacity(), 128)
+        drained = [heap.get_max() for _ in range(98)]
+        self.assertListEqual(drained, list(range(99, 1, -1)))
+        self.assertEqual(heap.capacity(), 4)  # halved at a quarter full, down to 2 elements in 4 slots
+        heap.get_max()
+        heap.get_max()
+        self.assertEqual(heap.capacity(), 2)
+        heap.heapify(list(range(10)))
+        self.assertEqual(heap.peek_max(), 9)
+
+        for shrink in (False, True):
+            s = BeehiveSelector(1, indexed=True, growable=True, shrink=shrink)
+            hives = [Beehive(i, i, i, capacity=1, nutrient_factor=i, volume=1) for i in range(20)]
+            for hive in hives:
+                s.add_beehive(hive)
+            for hive in hives[:15]:
+                s.remove_beehive(hive)
+            # growing alone keeps the array it grew to, shrinking gives it back
+            if shrink:
+                self.assertLessEqual(s.heap.capacity(), 20)
+            else:
+                self.assertEqual(s.heap.capacity(), 32)
+            self.assertEqual(s.harvest_many(5), 19 + 18 + 17 + 16 + 15)
+        with self.assertRaises(ValueError):
+            BeehiveSelector(1, shrink=True)
@@ -1,8 +1,10 @@
+import random
 import unittest
 from ed_utils.decorators import number, visibility
 from ed_utils.timeout import timeout
 
 from bst import BinarySearchTree
+from avl import AVLTree
 
 class BSTTest(unittest.TestCase):
 
@@ -77,3 +79,132 @@ class BSTTest(unittest.TestCase):
         kth = BST.kth_smallest(5, BST.root)
         self.assertEqual(kth.key, 95)
         self.assertEqual(kth.item, 1)
+
+    @timeout()
+    @number("1.4")
+    def test_avl_sorted_inserts(self):
+        AVL = AVLTree()
+        for key in range(1000):
+            AVL[key] = key * 2
+
+        # a plain BST would be a linked list of height 1000 here
+        self.assertLessEqual(AVL.root.height, 11)
+        self.assertEqual(len(AVL), 1000)
+        self.assertEqual(AVL.root.subtree_size, 1000)
+        for k in (1, 500, 1000):
+            kth = AVL.kth_smallest(k, AVL.root)
+            self.assertEqual(kth.key, k - 1)
+            self.assertEqual(kth.item, 2 * (k - 1))
+
+    @timeout()
+    @number("1.5")
+    def test_avl_delete(self):
+        random.seed(4312)
+        keys = list(range(300))
+        random.shuffle(keys)
+        AVL = AVLTree()
+        for key in keys:
+            AVL[key] = str(key)
+        with self.assertRaises(ValueError):
+            AVL[keys[0]] = "duplicate"
+
+        removed = set(keys[::3])
+        for key in keys[::3]:
+            del AVL[key]
+        with self.assertRaises(ValueError):
+            del AVL[keys[0]]
+
+        remaining = sorted(set(keys) - removed)
+        self.assertEqual(len(AVL), len(remaining))
+        self.assertEqual(AVL.root.subtree_size, len(remaining))
+        self.assertLessEqual(AVL.root.height, 10)
+        for k, key in enumerate(remaining, start=1):
+            self.assertEqual(AVL.kth_smallest(k, AVL.root).key, key)
+        self.assertNotIn(keys[0], AVL)
+        self.assertEqual(AVL[remaining[0]], str(remaining[0]))
+
+    @timeout()
+    @number("1.6")
+    def test_degenerate_tree(self):
+        BST = BinarySearchTree()
+        n = 3000  # well past the default recursion limit
+        for key in range(n):
+            BST[key] = -key
+        with self.assertRaises(ValueError):
+            BST[n - 1] = 0
+
+        self.assertEqual(BST.root.subtree_size, n)
+        self.assertEqual(BST[n - 1], -(n - 1))
+        self.assertNotIn(n, BST)
+        self.assertEqual(BST.kth_smallest(n, BST.root).key, n - 1)
+        with self.assertRaises(ValueError):
+            BST.kth_smallest(n + 1, BST.root)
+
+        del BST[0]  # the root, which has a single child
+        del BST[n // 2]
+        with self.assertRaises(ValueError):
+            del BST[n // 2]
+        self.assertEqual(len(BST), n - 2)
+        self.assertEqual(BST.root.subtree_size, n - 2)
+        self.assertEqual(BST.kth_smallest(n // 2, BST.root).key, n // 2 + 1)
+
+    @timeout()
+    @number("1.7")
+    def test_delete_two_children(self):
+        BST = BinarySearchTree()
+        for key in [50, 30, 70, 60, 80, 65, 62]:
+            BST[key] = key
+        # 60 has no left child, so it is the successor of 50 even though it is not a leaf
+        del BST[50]
+        self.assertEqual(BST.root.key, 60)
+        self.assertEqual(BST.root.subtree_size, 6)
+        self.assertEqual(BST.root.right.subtree_size, 4)
+        self.assertEqual(BST.root.right.left.key, 65)
+        self.assertEqual([BST.kth_smallest(k, BST.root).key for k in range(1, 7)], [30, 60, 62, 65, 70, 80])
+
+    @timeout()
+    @number("1.8")
+    def test_bulk_load(self):
+        random.seed(90210)
+        keys = list(range(1000))
+        random.shuffle(keys)
+        for tree_class in (BinarySearchTree, AVLTree):
+            tree = tree_class.from_items((key, str(key)) for key in keys)
+            self.assertIsInstance(tree, tree_class)
+            self.assertEqual(len(tree), 1000)
+            self.assertEqual(tree.root.key, 500)
+            self.assertEqual(tree.root.subtree_size, 1000)
+            self.assertEqual(tree.root.left.subtree_size, 500)
+            self.assertEqual(tree.root.right.subtree_size, 499)
+            for k in (1, 250, 1000):
+                self.assertEqual(tree.kth_smallest(k, tree.root).item, str(k - 1))
+
+            # the bulk loaded tree keeps working with the usual operations
+            tree[1000] = "1000"
+            del tree[500]
+            self.assertEqual(tree.kth_smallest(1000, tree.root).key, 1000)
+            self.assertEqual(tree.root.subtree_size, 1000)
+
+        self.assertEqual(AVLTree.from_sorted([(k, k) for k in range(1000)]).root.height, 10)
+        self.assertTrue(BinarySearchTree.from_sorted([]).is_empty())
+        with self.assertRaises(ValueError):
+            BinarySearchTree.from_items([(1, 'a'), (2, 'b'), (1, 'c')])
+        with self.assertRaises(ValueError):
+            AVLTree.from_sorted([(2, 'b'), (1, 'a')])
+
+    @timeout()
+    @number("1.9")
+    def test_rank_range(self):
+        random.seed(4242)
+        keys = list(range(300))
+        random.shuffle(keys)
+        for tree_class in (BinarySearchTree, AVLTree):
+            tree = tree_class()
+            for key in keys:
+                tree[key] = str(key)
+            for first, last in [(1, 300), (1, 1), (300, 300), (17, 160), (151, 150)]:
+                self.assertListEqual(tree.rank_range(first, last), [str(k - 1) for k in range(first, last + 1)])
+            with self.assertRaises(ValueError):
+                tree.rank_range(0, 5)
+            with self.assertRaises(ValueError):
+                tree.rank_range(290, 301)
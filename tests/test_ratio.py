@@ -3,7 +3,7 @@ import unittest
 from ed_utils.decorators import number, visibility
 from ed_utils.timeout import timeout
 
-from ratio import Percentiles
+from ratio import Percentiles, SketchPercentiles
 
 class RatioTest(unittest.TestCase):
 
@@ -39,4 +39,119 @@ class RatioTest(unittest.TestCase):
 
         p.remove_point(82)
         res = p.ratio(13, 10)
-        self.assertSetEqual(set(res), {14, 15, 16, 87, 91})
\ No newline at end of file
+        self.assertSetEqual(set(res), {14, 15, 16, 87, 91})
+
+    @timeout()
+    @number("2.3")
+    def test_avl_backend(self):
+        random.seed(2938742)
+        bst = Percentiles()
+        avl = Percentiles(backend="avl")
+        points = list(range(500))
+        for point in points:
+            bst.add_point(point)
+            avl.add_point(point)
+        for point in points[::7]:
+            bst.remove_point(point)
+            avl.remove_point(point)
+
+        for x, y in [(13, 10), (0, 42), (50, 50), (0, 0)]:
+            self.assertListEqual(avl.ratio(x, y), bst.ratio(x, y))
+        with self.assertRaises(ValueError):
+            Percentiles(backend="redblack")
+
+    @timeout()
+    @number("2.4")
+    def test_ratio_count(self):
+        random.seed(1293810293)
+        p = Percentiles()
+        points = [4, 9, 14, 15, 16, 82, 87, 91, 92, 99]
+        random.shuffle(points)
+        for point in points:
+            p.add_point(point)
+        for x, y in [(13, 10), (0, 42), (0, 0), (50, 50), (100, 0), (35, 64)]:
+            self.assertEqual(p.ratio_count(x, y), len(p.ratio(x, y)))
+        self.assertEqual(p.ratio_count(13, 10), 7)
+        self.assertEqual(Percentiles().ratio_count(10, 10), 0)
+
+    @timeout()
+    @number("2.5")
+    def test_sorted_backend(self):
+        random.seed(2938742)
+        avl = Percentiles(backend="avl")
+        array = Percentiles(backend="sorted")
+        points = list(range(500))
+        random.shuffle(points)
+        for point in points:
+            avl.add_point(point)
+            array.add_point(point)
+        for point in points[::7]:
+            avl.remove_point(point)
+            array.remove_point(point)
+
+        for x, y in [(13, 10), (0, 42), (50, 50), (0, 0), (99, 0)]:
+            self.assertListEqual(array.ratio(x, y), avl.ratio(x, y))
+            self.assertEqual(array.ratio_count(x, y), len(avl.ratio(x, y)))
+        self.assertListEqual(Percentiles.from_points(points, backend="sorted").ratio(0, 0), sorted(points))
+
+        with self.assertRaises(ValueError):
+            array.add_point(points[1])
+        with self.assertRaises(ValueError):
+            array.remove_point(points[0])
+
+    @timeout()
+    @number("2.6")
+    def test_sketch(self):
+        random.seed(7364)
+        points = random.sample(range(1000000), 50000)
+        ranks = {point: rank for rank, point in enumerate(sorted(points), 1)}
+        exact = Percentiles.from_points(points, backend="sorted")
+        sketch = SketchPercentiles.from_points(points, k=100, seed=1)
+        self.assertEqual(len(sketch.items), len(points))
+        self.assertLess(sum(len(compactor) for compactor in sketch.items.compactors), 1000)
+
+        error = sketch.ratio_error()
+        self.assertLess(error, len(points) // 20)
+        for x, y in [(13, 10), (0, 42), (45, 45), (1, 1), (0, 0)]:
+            for approximate, cutoff in zip(sketch.ratio_bounds(x, y), exact.ratio_bounds(x, y)):
+                self.assertLessEqual(abs(ranks[approximate] - ranks[cutoff]), error)
+            self.assertLessEqual(abs(len(sketch.rescan(x, y, points)) - sketch.ratio_count(x, y)), 2 * error)
+        self.assertIsNone(sketch.ratio_bounds(50, 50))
+        self.assertListEqual(sketch.rescan(50, 50, points), [])
+
+        # no compaction yet, so the sketch is exact
+        small = SketchPercentiles.from_points(points[:50])
+        self.assertEqual(small.ratio_error(), 0)
+        self.assertListEqual(small.rescan(15, 66, points[:50]), Percentiles.from_points(points[:50]).ratio(15, 66))
+
+    @timeout()
+    @number("2.7")
+    def test_cache(self):
+        random.seed(4471)
+        exact = Percentiles(backend="avl")
+        cached = Percentiles(backend="avl", cache_size=2)
+        points = set()
+        for step in range(300):
+            if points and step % 3 == 0:
+                point = random.choice(sorted(points))
+                points.remove(point)
+                exact.remove_point(point)
+                cached.remove_point(point)
+            else:
+                point = random.randrange(1000)
+                if point not in points:
+                    points.add(point)
+                    exact.add_point(point)
+                    cached.add_point(point)
+            for x, y in [(13, 10), (0, 42), (13, 10)]:
+                self.assertListEqual(cached.ratio(x, y), exact.ratio(x, y))
+
+        self.assertEqual(cached.cache_hits + cached.cache_misses, 900)
+        self.assertGreaterEqual(cached.cache_hits, 500)
+        self.assertEqual(len(cached.cache), 2)
+        cached.ratio(45, 45)  # evicts the least recently used (0, 42)
+        self.assertListEqual(list(cached.cache), [(13, 10), (45, 45)])
+
+        # results are copies, changing them does not change the cache
+        cached.ratio(13, 10).clear()
+        self.assertListEqual(cached.ratio(13, 10), exact.ratio(13, 10))
@@ -1,3 +1,4 @@
+import random
 import unittest
 from ed_utils.decorators import number, visibility
 from ed_utils.timeout import timeout
@@ -64,3 +65,162 @@ class TestThreeDeeBeeTree(unittest.TestCase):
         
         self.assertEqual(tdbt.get_tree_node_by_key((16, 0, -14)).item, 7)
         self.assertEqual(tdbt.get_tree_node_by_key((6, -1, -17)).item, 0)
+
+    @timeout()
+    @number("3.4")
+    def test_compact_nodes(self):
+        tdbt = ThreeDeeBeeTree()
+        for i, point in enumerate(self.TESTING_POINTS):
+            tdbt[point] = i
+
+        self.assertFalse(hasattr(tdbt.root, '__dict__'))
+        self.assertEqual(len(tdbt.root.nodes), 8)
+        self.assertEqual(sum(child is not None for child in tdbt.root.nodes), 4)
+
+    @timeout()
+    @number("3.5")
+    def test_octant_codes(self):
+        tdbt = ThreeDeeBeeTree()
+        for i, point in enumerate(self.TESTING_POINTS):
+            tdbt[point] = i
+
+        root = tdbt.root  # (6, -1, -17)
+        self.assertEqual(root.get_key((6, -1, -17)), 7)
+        self.assertEqual(root.get_key((5, 5, 7)), 3)
+        self.assertEqual(root.get_key((16, -5, -20)), 4)
+        self.assertIs(root.nodes[root.get_key((-11, 4, -16))], root.get_child_for_key((-11, 4, -16)))
+
+        with self.assertRaises(ValueError):
+            tdbt[(5, 5, 7)] = 42
+        self.assertEqual(len(tdbt), 10)
+        self.assertEqual(tdbt.root.subtree_size, 10)
+        self.assertEqual(root.get_child_for_key((-11, 4, -16)).subtree_size, 6)
+        self.assertEqual(tdbt[(5, 5, 7)], 2)
+        self.assertNotIn((5, 5, 8), tdbt)
+
+    @timeout()
+    @number("3.6")
+    def test_range_query(self):
+        random.seed(5512)
+        points = list({
+            (random.randint(-50, 50), random.randint(-50, 50), random.randint(-50, 50)) for _ in range(2000)
+        })
+        tdbt = ThreeDeeBeeTree()
+        for i, point in enumerate(points):
+            tdbt[point] = i
+
+        boxes = [((-10, -10, -10), (10, 10, 10)), ((-100, -100, -100), (100, 100, 100)),
+                 ((0, -50, 3), (0, 50, 40)), ((20, 20, 20), (10, 30, 30))]
+        for _ in range(20):
+            corner = [random.randint(-60, 60) for _ in range(3)]
+            other = [random.randint(-60, 60) for _ in range(3)]
+            boxes.append((tuple(map(min, corner, other)), tuple(map(max, corner, other))))
+
+        for lo, hi in boxes:
+            expected = {(p, i) for i, p in enumerate(points) if all(lo[a] <= p[a] <= hi[a] for a in range(3))}
+            found = list(tdbt.range_query(lo, hi))
+            self.assertEqual(len(found), len(expected))
+            self.assertSetEqual(set(found), expected)
+            self.assertEqual(tdbt.range_count(lo, hi), len(expected))
+
+        self.assertEqual(tdbt.range_count((-100, -100, -100), (100, 100, 100)), len(points))
+        self.assertEqual(list(ThreeDeeBeeTree().range_query((0, 0, 0), (1, 1, 1))), [])
+
+    @timeout()
+    @number("3.7")
+    def test_nearest(self):
+        random.seed(77031)
+        points = list({
+            (random.randint(-500, 500), random.randint(-500, 500), random.randint(-500, 500)) for _ in range(2000)
+        })
+        tdbt = ThreeDeeBeeTree()
+        for i, point in enumerate(points):
+            tdbt[point] = i
+
+        distances = {
+            "euclidean": lambda a, b: sum((a[i] - b[i]) ** 2 for i in range(3)),
+            "manhattan": lambda a, b: sum(abs(a[i] - b[i]) for i in range(3)),
+            "chebyshev": lambda a, b: max(abs(a[i] - b[i]) for i in range(3)),
+        }
+        for metric, distance in distances.items():
+            for _ in range(10):
+                target = (random.randint(-600, 600), random.randint(-600, 600), random.randint(-600, 600))
+                for k in (1, 5, 25):
+                    expected = sorted(points, key=lambda p: (distance(p, target), p))[:k]
+                    found = tdbt.nearest(target, k, metric=metric)
+                    self.assertListEqual([key for key, _ in found], expected)
+                    self.assertListEqual([item for _, item in found], [tdbt[p] for p in expected])
+
+        self.assertEqual(tdbt.nearest(points[0], 1), [(points[0], 0)])
+        self.assertEqual(len(tdbt.nearest((0, 0, 0), 5000)), len(points))
+        self.assertEqual(ThreeDeeBeeTree().nearest((0, 0, 0), 3), [])
+        with self.assertRaises(ValueError):
+            tdbt.nearest((0, 0, 0), 1, metric="hamming")
+
+        # k far past the size of the tree allocates nothing for the points that cannot be found
+        small = ThreeDeeBeeTree()
+        for i, point in enumerate(points[:10]):
+            small[point] = i
+        found = small.nearest((0, 0, 0), 10 ** 12)
+        self.assertListEqual(sorted(key for key, _ in found), sorted(points[:10]))
+
+    def assertSubtreeSizes(self, node):
+        """ Checks that the subtree_size of node and every descendant counts the nodes below them. """
+        if node is None:
+            return 0
+        size = 1 + sum(self.assertSubtreeSizes(child) for child in node.nodes)
+        self.assertEqual(node.subtree_size, size)
+        return size
+
+    @timeout()
+    @number("3.8")
+    def test_delete(self):
+        random.seed(1130)
+        points = list({(random.randint(0, 99), random.randint(0, 99), random.randint(0, 99)) for _ in range(1500)})
+        tdbt = ThreeDeeBeeTree()
+        for i, point in enumerate(points):
+            tdbt[point] = i
+
+        del tdbt[points[0]]  # the root
+        removed = {points[0]}
+        for point in random.sample(points[1:], 700):
+            del tdbt[point]
+            removed.add(point)
+        with self.assertRaises(ValueError):
+            del tdbt[points[0]]
+
+        self.assertEqual(len(tdbt), len(points) - len(removed))
+        self.assertEqual(self.assertSubtreeSizes(tdbt.root), len(tdbt))
+        for i, point in enumerate(points):
+            if point in removed:
+                self.assertNotIn(point, tdbt)
+            else:
+                self.assertEqual(tdbt[point], i)
+
+        for point in list(tdbt.range_query((0, 0, 0), (99, 99, 99))):
+            del tdbt[point[0]]
+        self.assertTrue(tdbt.is_empty())
+        self.assertIsNone(tdbt.root)
+
+    @timeout()
+    @number("3.9")
+    def test_rebuild(self):
+        random.seed(2718)
+        points = list({(random.randint(0, 99), random.randint(0, 99), random.randint(0, 99)) for _ in range(1500)})
+        tdbt = ThreeDeeBeeTree()
+        for i, point in enumerate(sorted(points)):  # sorted by x, a deep tree to rebuild
+            tdbt[point] = i
+        tdbt.root = tdbt.rebuild(list(tdbt.subtree_nodes(tdbt.root)))
+
+        self.assertEqual(len(tdbt), len(points))
+        self.assertEqual(self.assertSubtreeSizes(tdbt.root), len(points))
+        for i, point in enumerate(sorted(points)):
+            self.assertEqual(tdbt[point], i)
+        self.assertEqual(sorted(tdbt.range_query((0, 0, 0), (100, 100, 100))),
+                         sorted((point, i) for i, point in enumerate(sorted(points))))
+
+        tdbt[(-1, -1, -1)] = -1  # the rebuilt tree is an ordinary tree
+        self.assertEqual(tdbt[(-1, -1, -1)], -1)
+        self.assertEqual(len(tdbt), len(points) + 1)
+
+        self.assertIsNone(tdbt.rebuild([]))
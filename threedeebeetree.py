@@ -1,28 +1,46 @@
 from __future__ import annotations
-from typing import Generic, TypeVar, Tuple, Dict, Any
+from typing import Generic, TypeVar, Tuple, Dict, Any, Iterator
 from dataclasses import dataclass, field
+from heap import MaxHeap
+from octants import Point, OCTANT_X, OCTANT_Y, OCTANT_Z
+from balancing import make_ordering
 
 I = TypeVar('I')
-Point = Tuple[int, int, int]
 
+# distances used by ThreeDeeBeeTree.nearest(), as functions of the absolute differences along each axis;
+# euclidean is left squared, which orders points the same way
+METRICS = {
+    "euclidean": lambda dx, dy, dz: dx * dx + dy * dy + dz * dz,
+    "manhattan": lambda dx, dy, dz: dx + dy + dz,
+    "chebyshev": lambda dx, dy, dz: max(dx, dy, dz),
+}
 
-@dataclass
+
+@dataclass(slots=True)
 class BeeNode:
     """
     *** We have consulted ed on using an unconventional solution for this task. ***
     *** Please refer to the following link (private): https://edstem.org/au/courses/10179/discussion/1387178?answer=3111657 ***
+
+    The children are kept in a fixed list of 8 slots, indexed by octant code, and the node itself is slotted,
+    so a node costs a few hundred bytes less than with a __dict__ and a dictionary of children.
+    unbalanced_size is the subtree_size at which a rebuild could not balance the node, 0 if it could.
+    balance_slack is how much the node can still take before its balance has to be checked again, see
+    ThreeDeeBeeTree.rebalance_path(); 0, the default, has it checked on the next update below it.
     """
     key: Point
     item: I
     subtree_size: int = 1
-    nodes: dict = field(
-        default_factory=lambda: {"+++": None, "++-": None, "+-+": None, "+--": None,
-                                 "-++": None, "-+-": None, "--+": None, "---": None})
+    nodes: list = field(default_factory=lambda: [None] * 8)
+    unbalanced_size: int = 0
+    balance_slack: int = 0
 
     def get_child_for_key(self, point: Point) -> BeeNode | None:
         """
             Explain:
             - Given a point, computes the correct key that gets the BeeNode that lies in the octant.
+            - ThreeDeeBeeTree computes the octant code inline on its hot paths; this is kept for callers that
+            only have a point at hand.
 
             Args:
             - point: a point in 3d space
@@ -32,21 +50,20 @@ class BeeNode:
 
             Complexity:
             self.get_key(point) has a complexity of O(1);
-            and accessing a dictionary is O(1) in the average case.
+            and indexing the list of children is O(1).
             - Worst case: O(1)
             - Best case: O(1)
        """
-        key = self.get_key(point)
-        return self.nodes[key]
+        return self.nodes[self.get_key(point)]
 
     def get_key(self, point):
         """
         Explain:
-            - given a point, return the key of the dictionary self.nodes that should contain it.
-            - the key is a string of three characters, each of which is either "+" or "-".
-            - the first character is "+" if the x-coordinate of the point is greater than the x-coordinate of the node,
-            and "-" otherwise.
-            - note that it does not matter if we use ">" or ">="; AND whether we output "+" or "-" when x is greater.
+            - given a point, return the octant code, i.e. the index in self.nodes of the child that should contain it.
+            - the code is an integer from 0 to 7 made of three bits, OCTANT_X, OCTANT_Y and OCTANT_Z.
+            - the OCTANT_X bit is set if the x-coordinate of the point is greater than or equal to the x-coordinate
+            of the node, and clear otherwise; likewise for y and z.
+            - note that it does not matter if we use ">" or ">="; AND whether we set or clear the bit when x is greater.
             in the above definition, as long as we are consistent.
             This is because this method is aa high level abstraction of the underlying implementation of the tree, and
             we frankly don't care which coordinate is used to compare the points, or whether we use ">" or ">=",
@@ -57,26 +74,35 @@ class BeeNode:
             - Worst case: O(1)
             - Best case: O(1)
         """
-        x_self, x_point = self.key[0], point[0]
-        y_self, y_point = self.key[1], point[1]
-        z_self, z_point = self.key[2], point[2]
-
-        return ("+" if x_self <= x_point else "-") + ("+" if y_self <= y_point else "-") + (
-            "+" if z_self <= z_point else "-")
+        key = self.key
+        return (key[0] <= point[0]) << 2 | (key[1] <= point[1]) << 1 | (key[2] <= point[2])
 
 
 class ThreeDeeBeeTree(Generic[I]):
     """ 3️⃣🇩🐝🌳 tree. """
 
-    def __init__(self) -> None:
+    # a node is balanced when, along every axis, the larger side has at most BALANCE_RATIO times the points of
+    # the smaller side; sides smaller than BALANCE_MIN_SIZE are too small to be worth checking
+    BALANCE_RATIO = 7
+    BALANCE_MIN_SIZE = 19
+    # a node that its last rebuild could not balance is only rebuilt again once its size has changed by
+    # 1/RETRY_FRACTION of the size it was rebuilt at
+    RETRY_FRACTION = 2
+
+    def __init__(self, auto_balance: bool = False) -> None:
         """
             Initialises an empty 3DBT
 
+            Args:
+            - auto_balance, whether to rebuild unbalanced subtrees after every insertion and deletion,
+            see rebalance_path()
+
             Complexity:
             O(1) Constant time
         """
         self.root = None
         self.length = 0
+        self.auto_balance = auto_balance
 
     def is_empty(self) -> bool:
         """
@@ -192,6 +218,7 @@ class ThreeDeeBeeTree(Generic[I]):
         """
             Explain:
             - Search the node located in the subtree rooted at current
+            - Descends in a loop, indexing each node's children by the integer octant code of the key.
 
             Args:
             - current
@@ -225,11 +252,14 @@ class ThreeDeeBeeTree(Generic[I]):
                     - thus it just have to compare for checking the key once and directly return.
                     - Return statement is constant time, O(1).
         """
-        if current is None:
-            raise KeyError('Key not found: {0}'.format(key))
-        if key == current.key:
-            return current
-        return self.get_tree_node_by_key_aux(current.get_child_for_key(key), key)
+        x, y, z = key
+        while current is not None:
+            node_key = current.key
+            if key == node_key:
+                return current
+            # inlined BeeNode.get_key(), this is the innermost loop of every lookup
+            current = current.nodes[(node_key[0] <= x) << 2 | (node_key[1] <= y) << 1 | (node_key[2] <= z)]
+        raise KeyError('Key not found: {0}'.format(key))
 
     def __setitem__(self, key: Point, item: I) -> None:
         """
@@ -263,11 +293,15 @@ class ThreeDeeBeeTree(Generic[I]):
                         - All assignments, numerical operations, return statements are constant time, O(1).
         """
         self.root = self.insert_aux(self.root, key, item)
+        if self.auto_balance:
+            self.root = self.rebalance_path(self.root, key)
 
     def insert_aux(self, current: BeeNode, key: Point, item: I) -> BeeNode:
         """
             Explain:
             - Attempts to insert an item into the tree, it uses the Key to insert it
+            - Descends in a loop, incrementing the subtree_size of every node it passes and indexing the
+            children by the integer octant code of the key. A duplicate key takes those increments back.
 
             Args:
             - current, BeeNode which is the root of the 3DBT
@@ -299,22 +333,545 @@ class ThreeDeeBeeTree(Generic[I]):
                         - CompK is the complexity of comparing the keys
                         - All assignments, numerical operations, return statements are constant time, O(1).
         """
-        if current is None:  # base case: at the leaf
-            current = BeeNode(key, item=item)
+        if current is None:  # empty tree: the new node is the root
             self.length += 1
-        elif key == current.key:
-            raise ValueError('Inserting duplicate item')
+            return BeeNode(key, item=item)
+
+        x, y, z = key
+        parent = current
+        while True:
+            node_key = parent.key
+            if key == node_key:
+                self.undo_insert_sizes(current, key)
+                raise ValueError('Inserting duplicate item')
+            # inlined BeeNode.get_key()
+            k_ = (node_key[0] <= x) << 2 | (node_key[1] <= y) << 1 | (node_key[2] <= z)
+            parent.subtree_size += 1
+            child = parent.nodes[k_]
+            if child is None:
+                parent.nodes[k_] = BeeNode(key, item=item)
+                break
+            parent = child
+
+        self.length += 1
+        return current
+
+    def undo_insert_sizes(self, current: BeeNode, key: Point) -> None:
+        """
+            Explain:
+            - Decrements the subtree_size of every node on the path from current down to the node holding key,
+            excluding that node, i.e. the nodes insert_aux() incremented before it found a duplicate.
+
+            Args:
+            - current, BeeNode which is the root of the 3DBT
+            - key, the duplicate key, which is known to be in the tree
+
+            Complexity:
+            - Worst case: O(CompK * D), where D is the depth of the node holding key
+            - Best case: O(CompK), the key is in the root
+        """
+        while key != current.key:
+            current.subtree_size -= 1
+            current = current.get_child_for_key(key)
+
+    def __delitem__(self, key: Point) -> None:
+        """
+            Explain:
+            - Attempts to delete an item from the tree, it uses the Key to determine the node to delete.
+
+            Args:
+            - key, the key of the node to delete
+
+            Raises:
+            - ValueError, if the key is not in the tree
+
+            Complexity: O(Comp(delete_aux)). See the function.
+        """
+        self.root = self.delete_aux(self.root, key)
+        if self.auto_balance:
+            self.root = self.rebalance_path(self.root, key, deleted=True)
+
+    def delete_aux(self, current: BeeNode, key: Point) -> BeeNode | None:
+        """
+            Explain:
+            - Deletes the node holding key from the subtree rooted at current.
+            - Unlike a binary tree, a node's successor cannot take its place, as the successor along one axis is
+            not the successor along the others. Instead, the node is cut out together with its subtree, and every
+            other node of that subtree is re-inserted into the vacated octant, in pre-order. Re-inserting a subtree
+            in pre-order rebuilds it with the same shape, so the first child subtree keeps its structure and the
+            other ones are merged into it. With auto_balance, they are built into a balanced subtree by rebuild()
+            instead.
+            - The subtree_size of every ancestor drops by one, and length by one.
+
+            Args:
+            - current, BeeNode which is the root of the 3DBT
+            - key, the key of the node to delete
+
+            Raises:
+            - ValueError, if the key is not in the tree
+
+            Returns:
+            - the root of the 3DBT
+
+            Complexity:
+            - Worst case: O(CompK * (D + S * D')), where D is the depth of the node, S the size of its subtree and
+            D' the depth of the rebuilt subtree. Deleting the root costs as much as rebuilding the whole tree.
+            - Best case: O(CompK * D), the node is a leaf
+            - Amortized: for a node picked at random in a tree built in random order, S is O(log(N)) in
+            expectation, hence deletion costs O(log(N)^2), against O(N * log(N)) for a rebuild of the tree.
+        """
+        path = []
+        code = None
+        node = current
+        while node is not None and node.key != key:
+            path.append(node)
+            code = node.get_key(key)
+            node = node.nodes[code]
+        if node is None:
+            raise ValueError('Deleting non-existent item')
+
+        descendants = [descendant for descendant in self.subtree_nodes(node) if descendant is not node]
+        if self.auto_balance:
+            # the rebuilt nodes are off the path that rebalance_path() checks, so keep them balanced here
+            self.length -= 1
+            rebuilt = self.rebuild(descendants)
         else:
-            k_ = current.get_key(key)
-            current.subtree_size += 1
-            current.nodes[k_] = self.insert_aux(current.nodes[k_], key, item)
+            self.length -= node.subtree_size
+            rebuilt = None
+            for descendant in descendants:
+                # insert_aux() adds each one back to length
+                rebuilt = self.insert_aux(rebuilt, descendant.key, descendant.item)
+
+        for ancestor in path:
+            ancestor.subtree_size -= 1
+        if not path:
+            return rebuilt
+        path[-1].nodes[code] = rebuilt
+        return current
+
+    def is_balanced(self, current: BeeNode) -> bool:
+        """
+            Explain:
+            - Checks the 1:BALANCE_RATIO bound between the positive and negative sides of current along each axis.
+
+            Args:
+            - current, the node to check
+
+            Returns:
+            - Boolean
+                - true, if every axis is within the bound, or both of its sides are smaller than BALANCE_MIN_SIZE
+                - false, otherwise
+
+            Complexity:
+            - Worst case: O(1), see balance_margin()
+            - Best case: O(1), see balance_margin()
+        """
+        return self.balance_margin(current) >= 0
+
+    def balance_margin(self, current: BeeNode) -> int:
+        """
+            Explain:
+            - Returns how far current is from breaking the balance bound, taking the tightest axis: the larger side
+            may grow up to BALANCE_RATIO times the smaller one, or up to BALANCE_MIN_SIZE - 1 points, whichever is
+            more. Negative when current is unbalanced.
+            - An insertion below current brings it at most 1 closer to the bound, and a deletion at most
+            BALANCE_RATIO closer, by taking a point off the smaller side.
+
+            Args:
+            - current, the node to check
+
+            Returns:
+            - the margin, in points
+
+            Complexity:
+            - Worst case: O(1), a fixed number of sums over the 8 octants
+            - Best case: O(1), same as the worst case
+        """
+        # the sizes by octant code, named by side along x, y and z: n for negative, p for positive
+        nnn, nnp, npn, npp, pnn, pnp, ppn, ppp = [child.subtree_size if child is not None else 0
+                                                  for child in current.nodes]
+        below = current.subtree_size - 1
+        margin = below * self.BALANCE_RATIO + self.BALANCE_MIN_SIZE
+        for positive in (pnn + pnp + ppn + ppp, npn + npp + ppn + ppp, nnp + npp + pnp + ppp):
+            negative = below - positive
+            if positive < negative:
+                positive, negative = negative, positive
+            margin = min(margin, max(self.BALANCE_RATIO * negative, self.BALANCE_MIN_SIZE - 1) - positive)
+        return margin
+
+    def rebalance_path(self, current: BeeNode | None, key: Point, deleted: bool = False) -> BeeNode | None:
+        """
+            Explain:
+            - Scapegoat rebalancing: walks the search path of key from current, the path an insertion or deletion
+            of key has just changed, and rebuilds the subtree of the first, i.e. highest, unbalanced node on it.
+            - A node is not checked on every update below it: its balance_slack is the balance_margin() it had when
+            last checked, and every update takes off the most it can bring the node closer to the bound, 1 for an
+            insertion and BALANCE_RATIO for a deletion. The node cannot be unbalanced before its slack runs out,
+            and only then is it checked again by check_balance(), which sets a new slack. A balanced node of S
+            points usually has a slack of Omega(S), so on balanced inputs a node is checked once every Omega(S)
+            updates below it, and the walk does O(1) work per level.
+            - The subtree is rebuilt by rebuild(), which inserts its points in balanced order, so that every node
+            of the new subtree is balanced again.
+            - Except when no pivot can balance an axis, e.g. when all the points of the subtree lie on a plane or
+            a line: a rebuild would leave the node just as unbalanced, and rebuilding the root on every insertion
+            would take quadratic time. Such a node is skipped until its size has changed by 1/RETRY_FRACTION
+            since the rebuild that left it unbalanced, see can_rebuild(), so its rebuilds grow geometrically.
+
+            Args:
+            - current, BeeNode which is the root of the 3DBT
+            - key, the key that was just inserted or deleted
+            - deleted, whether key was deleted rather than inserted
+
+            Returns:
+            - the root of the 3DBT
+
+            Complexity:
+            - Worst case: O(D + Comp(rebuild)), where D is the depth of key and the rebuild is of the root
+            - Best case: O(D), no node on the path runs out of slack
+            - Amortized: a freshly rebuilt subtree of S points typically takes Omega(S) updates below it to become
+            unbalanced again, which pay for the O(S * log(S)) rebuild, and the depth stays O(log(N)).
+        """
+        cost = self.BALANCE_RATIO if deleted else 1
+        x, y, z = key
+        parent, code, node = None, None, current
+        while node is not None:
+            node.balance_slack -= cost
+            if node.balance_slack < 0 and self.check_balance(node):
+                rebuilt = self.rebuild(list(self.subtree_nodes(node)))
+                if parent is None:
+                    return rebuilt
+                parent.nodes[code] = rebuilt
+                return current
+            node_key = node.key
+            if node_key == key:
+                break
+            # inlined BeeNode.get_key()
+            parent, code = node, (node_key[0] <= x) << 2 | (node_key[1] <= y) << 1 | (node_key[2] <= z)
+            node = node.nodes[code]
         return current
 
+    def check_balance(self, current: BeeNode) -> bool:
+        """
+            Explain:
+            - Checks whether current should be rebuilt, i.e. it is unbalanced and can_rebuild(), and otherwise
+            sets its balance_slack to the number of updates it can take before it has to be checked again: its
+            balance_margin() if it is balanced, or the updates left before can_rebuild() if it is not.
+
+            Args:
+            - current, the node to check
+
+            Returns:
+            - Boolean, whether to rebuild current
+
+            Complexity:
+            - Worst case: O(1), see balance_margin()
+            - Best case: O(1), see balance_margin()
+        """
+        margin = self.balance_margin(current)
+        if margin >= 0:
+            current.balance_slack = margin
+            return False
+        if self.can_rebuild(current):
+            return True
+        built = current.unbalanced_size
+        current.balance_slack = -(-built // self.RETRY_FRACTION) - abs(current.subtree_size - built) - 1
+        return False
+
+    def can_rebuild(self, current: BeeNode) -> bool:
+        """
+            Explain:
+            - Checks whether rebuilding current may balance it: always, unless its last rebuild left it unbalanced
+            and its size has changed by less than 1/RETRY_FRACTION since.
+
+            Args:
+            - current, the node to check
+
+            Returns:
+            - Boolean
+
+            Complexity:
+            - Worst case: O(1), numerical operations
+            - Best case: O(1), numerical operations
+        """
+        built = current.unbalanced_size
+        return not built or abs(current.subtree_size - built) * self.RETRY_FRACTION >= built
+
+    def rebuild(self, nodes: list[BeeNode]) -> BeeNode | None:
+        """
+            Explain:
+            - Builds a balanced subtree out of the keys and items of nodes, by inserting them into a new subtree in
+            the order of make_ordering(). The nodes themselves are left untouched, and so is length.
+            - Every new node of more than BALANCE_MIN_SIZE points then gets its balance_slack from check_balance(),
+            and one that is still unbalanced, because all of its points share a coordinate along some axis, e.g.
+            points on a plane, gets its unbalanced_size set, see rebalance_path(). Smaller subtrees, most of the
+            nodes, are balanced whatever their shape, and are left to be checked on their next update.
+
+            Args:
+            - nodes, the nodes to take the keys and items from, typically every node of a subtree
+
+            Returns:
+            - the root of the new subtree, or None if there are no nodes
+
+            Complexity:
+            - Worst case: O(S * log(S)), where S is the number of nodes, the ordering and S insertions into a
+            balanced subtree
+            - Best case: same as the worst case
+        """
+        items = {node.key: node.item for node in nodes}
+        length = self.length
+        rebuilt = None
+        for key in make_ordering(list(items)):
+            rebuilt = self.insert_aux(rebuilt, key, items[key])
+        self.length = length
+
+        stack = [rebuilt] if rebuilt is not None else []
+        while stack:
+            node = stack.pop()
+            if node.subtree_size > self.BALANCE_MIN_SIZE:
+                if self.check_balance(node):
+                    node.unbalanced_size = node.subtree_size
+                    self.check_balance(node)
+                stack.extend(child for child in node.nodes if child is not None)
+        return rebuilt
+
+    def range_query(self, lo: Point, hi: Point) -> Iterator[Tuple[Point, I]]:
+        """
+            Explain:
+            - Lazily yields the (key, item) pairs of every point inside the axis-aligned box lo <= point <= hi.
+            - Each node splits space at its key, so the octants of the subtree rooted at a node cover a box of
+            their own. Octants that cannot intersect the query box are never visited, and octants that lie fully
+            inside of it are yielded without any more comparisons.
+
+            Args:
+            - lo, the corner of the box with the smallest coordinates, inclusive
+            - hi, the corner of the box with the largest coordinates, inclusive
+
+            Returns:
+            - a generator of (key, item) pairs, in no particular order
+
+            Complexity:
+            - Worst case: O(N), every octant intersects the box, e.g. when the box covers all points
+            - Best case: O(1), the box misses every octant of the root
+            - In a balanced tree, the cost is roughly that of the nodes whose octants straddle the box's faces,
+            plus O(1) per point yielded.
+        """
+        for current, contained in self.range_nodes(lo, hi):
+            if contained:
+                for node in self.subtree_nodes(current):
+                    yield node.key, node.item
+            elif self.in_box(current.key, lo, hi):
+                yield current.key, current.item
+
+    def range_count(self, lo: Point, hi: Point) -> int:
+        """
+            Explain:
+            - Counts the points inside the axis-aligned box lo <= point <= hi, like range_query() but without
+            yielding them. An octant lying fully inside the box adds its subtree_size without being descended into.
+
+            Args:
+            - lo, the corner of the box with the smallest coordinates, inclusive
+            - hi, the corner of the box with the largest coordinates, inclusive
+
+            Returns:
+            - the number of points inside the box
+
+            Complexity:
+            - Worst case: O(N), every octant straddles the box
+            - Best case: O(1), the box misses every octant of the root, or contains all of it
+        """
+        count = 0
+        for current, contained in self.range_nodes(lo, hi):
+            if contained:
+                count += current.subtree_size
+            elif self.in_box(current.key, lo, hi):
+                count += 1
+        return count
+
+    def range_nodes(self, lo: Point, hi: Point) -> Iterator[Tuple[BeeNode, bool]]:
+        """
+            Explain:
+            - Walks the nodes whose octant intersects the box lo <= point <= hi, with an explicit stack.
+            - Every node is yielded along with whether its whole octant lies inside the box, in which case its
+            children are not visited, as the caller can deal with the whole subtree at once.
+            - The octant of a node is the half-open box [cell_lo, cell_hi) cut out by the keys of its ancestors:
+            a set bit of the octant code means the coordinate is >= the parent's, a clear bit means it is <.
+
+            Args:
+            - lo, the corner of the box with the smallest coordinates, inclusive
+            - hi, the corner of the box with the largest coordinates, inclusive
+
+            Returns:
+            - a generator of (node, contained) pairs
+
+            Complexity:
+            - Worst case: O(N), every octant intersects the box
+            - Best case: O(1), the tree is empty
+        """
+        if self.root is None:
+            return
+        lo_x, lo_y, lo_z = lo
+        hi_x, hi_y, hi_z = hi
+        infinity = float('inf')
+        stack = [(self.root, -infinity, -infinity, -infinity, infinity, infinity, infinity)]
+        while stack:
+            current, cell_lo_x, cell_lo_y, cell_lo_z, cell_hi_x, cell_hi_y, cell_hi_z = stack.pop()
+            if (lo_x <= cell_lo_x and cell_hi_x <= hi_x and lo_y <= cell_lo_y and cell_hi_y <= hi_y
+                    and lo_z <= cell_lo_z and cell_hi_z <= hi_z):
+                yield current, True
+                continue
+            yield current, False
+
+            key_x, key_y, key_z = current.key
+            # the sides of each axis that the box reaches into, the negative one holds coordinates < key
+            neg_x, pos_x = lo_x < key_x, key_x <= hi_x
+            neg_y, pos_y = lo_y < key_y, key_y <= hi_y
+            neg_z, pos_z = lo_z < key_z, key_z <= hi_z
+            for code, child in enumerate(current.nodes):
+                if child is None:
+                    continue
+                if code & OCTANT_X:
+                    if not pos_x:
+                        continue
+                    child_lo_x, child_hi_x = key_x, cell_hi_x
+                else:
+                    if not neg_x:
+                        continue
+                    child_lo_x, child_hi_x = cell_lo_x, key_x
+                if code & OCTANT_Y:
+                    if not pos_y:
+                        continue
+                    child_lo_y, child_hi_y = key_y, cell_hi_y
+                else:
+                    if not neg_y:
+                        continue
+                    child_lo_y, child_hi_y = cell_lo_y, key_y
+                if code & OCTANT_Z:
+                    if not pos_z:
+                        continue
+                    child_lo_z, child_hi_z = key_z, cell_hi_z
+                else:
+                    if not neg_z:
+                        continue
+                    child_lo_z, child_hi_z = cell_lo_z, key_z
+                stack.append((child, child_lo_x, child_lo_y, child_lo_z, child_hi_x, child_hi_y, child_hi_z))
+
+    def nearest(self, point: Point, k: int = 1, metric: str = "euclidean") -> list[Tuple[Point, I]]:
+        """
+            Explain:
+            - Finds the k points of the tree closest to point, under one of the METRICS.
+            - Branch and bound over the octants: the k best candidates so far are kept in a MaxHeap, so the worst
+            of them is always at hand. An octant is only descended into if the distance from point to the
+            nearest corner of its box could beat that worst candidate, and the octants of a node are visited
+            closest first, so that the candidates improve as early as possible.
+
+            Args:
+            - point, the point to search around, which does not have to be in the tree
+            - k, the number of points to find
+            - metric, "euclidean", "manhattan" or "chebyshev"
+
+            Raises:
+            - ValueError, if the metric is not one of METRICS
+
+            Returns:
+            - up to k (key, item) pairs, nearest first; ties are broken by the smaller key
+
+            Complexity:
+            - Worst case: O(N * log(k)), no octant can be pruned, e.g. when all points are equidistant
+            - Best case: O(1), the tree is empty or k is not positive
+            - k is capped at N, so that a k much larger than the tree allocates no more than N heap slots
+            - In a balanced tree with spread out points, only the octants around point are visited, roughly
+            O(log(N) + k * log(k)).
+        """
+        if metric not in METRICS:
+            raise ValueError('Unknown metric: {0}'.format(metric))
+        distance = METRICS[metric]
+        if k <= 0 or self.root is None:
+            return []
+
+        x, y, z = point
+        # no more than every point can be found, and the heap's array is allocated for k of them up front
+        k = min(k, len(self))
+        best = MaxHeap(k)
+        infinity = float('inf')
+        stack = [(0, self.root, -infinity, -infinity, -infinity, infinity, infinity, infinity)]
+        while stack:
+            bound, current, cell_lo_x, cell_lo_y, cell_lo_z, cell_hi_x, cell_hi_y, cell_hi_z = stack.pop()
+            if len(best) == k and bound > best.peek_max()[0]:
+                continue
+
+            key_x, key_y, key_z = key = current.key
+            candidate = (distance(abs(key_x - x), abs(key_y - y), abs(key_z - z)), key, current.item)
+            if len(best) < k:
+                best.add(candidate)
+            elif candidate < best.peek_max():
+                best.get_max()
+                best.add(candidate)
+
+            children = []
+            for code, child in enumerate(current.nodes):
+                if child is None:
+                    continue
+                if code & OCTANT_X:
+                    child_lo_x, child_hi_x = key_x, cell_hi_x
+                else:
+                    child_lo_x, child_hi_x = cell_lo_x, key_x
+                if code & OCTANT_Y:
+                    child_lo_y, child_hi_y = key_y, cell_hi_y
+                else:
+                    child_lo_y, child_hi_y = cell_lo_y, key_y
+                if code & OCTANT_Z:
+                    child_lo_z, child_hi_z = key_z, cell_hi_z
+                else:
+                    child_lo_z, child_hi_z = cell_lo_z, key_z
+                # distance from point to the closest corner of the child's box, 0 along an axis it spans
+                child_bound = distance(max(child_lo_x - x, 0, x - child_hi_x),
+                                       max(child_lo_y - y, 0, y - child_hi_y),
+                                       max(child_lo_z - z, 0, z - child_hi_z))
+                if len(best) < k or child_bound <= best.peek_max()[0]:
+                    children.append((child_bound, child, child_lo_x, child_lo_y, child_lo_z,
+                                     child_hi_x, child_hi_y, child_hi_z))
+            # the closest child goes on top of the stack
+            children.sort(key=lambda entry: entry[0], reverse=True)
+            stack.extend(children)
+
+        found = []
+        while len(best) > 0:
+            found.append(best.get_max())
+        return [(key, item) for _, key, item in reversed(found)]
+
+    def in_box(self, point: Point, lo: Point, hi: Point) -> bool:
+        """
+            Explain:
+            - Checks whether point lies inside the axis-aligned box lo <= point <= hi.
+
+            Complexity:
+            - Worst case: O(1), three pairs of comparisons
+            - Best case: O(1), the first comparison fails
+        """
+        return lo[0] <= point[0] <= hi[0] and lo[1] <= point[1] <= hi[1] and lo[2] <= point[2] <= hi[2]
+
+    def subtree_nodes(self, current: BeeNode | None) -> Iterator[BeeNode]:
+        """
+            Explain:
+            - Yields every node of the subtree rooted at current in pre-order, with an explicit stack.
+
+            Complexity:
+            - Worst case: O(S), where S is the size of the subtree
+            - Best case: O(1), current is None
+        """
+        stack = [current] if current is not None else []
+        while stack:
+            current = stack.pop()
+            yield current
+            for child in reversed(current.nodes):
+                if child is not None:
+                    stack.append(child)
+
     def is_leaf(self, current: BeeNode) -> bool:
         """
             Explain:
-            - Simple check whether the node is a leaf. It looks at the nodes' dictionary, and if all of the
-            values are None, then it is a leaf.
+            - Simple check whether the node is a leaf, i.e. all of its octants are None, which is the case
+            exactly when its subtree only contains itself.
 
             Args:
             - current, the node to check